@@ -4,10 +4,32 @@ import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
+from sklearn.metrics import r2_score
 import joblib
+import sklearn
 import os
-from datetime import datetime, timedelta
+import gc
+import ctypes
+import json
+import shutil
+import sys
+import threading
+import time
+import multiprocessing
+from datetime import datetime
 import requests
+from sqlalchemy import create_engine, text
+from flat_forest import FlatForest
+
+try:
+    import resource
+except ImportError:  # not available on Windows: peak memory is not reported
+    resource = None
+
+try:
+    malloc_trim = ctypes.CDLL(None).malloc_trim
+except (OSError, TypeError, AttributeError):  # glibc only
+    malloc_trim = None
 
 app = Flask(__name__)
 
@@ -15,75 +37,543 @@ app = Flask(__name__)
 models = {}
 scalers = {}
 price_data = {}
+trend_columns = {}
+region_latest = {}
+
+# Guards swapping a millet type's model, scaler and metadata in together
+models_lock = threading.RLock()
+
+MILLET_TYPES = ['Pearl Millet', 'Finger Millet', 'Foxtail Millet', 'Little Millet', 'Proso Millet']
+FEATURE_COLUMNS = ['seasonal_factor', 'demand_factor', 'supply_factor',
+                   'weather_factor', 'market_trend', 'government_subsidy']
+
+# Real market data: when MARKET_DATA_URL points at the platform database the
+# models learn from its market_price rows, read MARKET_CHUNK_SIZE at a time.
+# Each artifact records its watermark (the last day ingested); a refresh reads
+# only rows from that day on and retrains the millet types that changed.
+MARKET_DATA_URL = os.environ.get('MARKET_DATA_URL')
+MARKET_CHUNK_SIZE = int(os.environ.get('MARKET_CHUNK_SIZE', 50000))
+MARKET_MIN_DAYS = int(os.environ.get('MARKET_MIN_DAYS', 200))  # daily series points needed to train
+MARKET_REFRESH_SECONDS = int(os.environ.get('MARKET_REFRESH_SECONDS', 3600))
+MARKET_TRAINING_LAGS = (1, 7, 14, 30)  # observations looked back when building training rows
+MARKET_FEATURE_COLUMNS = ['season_sin', 'season_cos', 'last_price', 'mean_price_7',
+                          'mean_price_30', 'days_since_last']
+
+# Model registry: MODEL_DIR/<millet-slug>/<version>/ holds the fitted model,
+# scaler, price history and metadata.json; MODEL_DIR/<millet-slug>/LATEST
+# names the version to serve.
+MODEL_DIR = os.environ.get('MODEL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models'))
+MODEL_KEEP_VERSIONS = int(os.environ.get('MODEL_KEEP_VERSIONS', 3))
+
+# Training: millet types are fitted in parallel worker processes, each forest
+# using TRAINING_N_JOBS cores, within a budget of TRAINING_CORES cores
+TRAINING_CORES = int(os.environ.get('TRAINING_CORES', os.cpu_count() or 1))
+TRAINING_N_JOBS = int(os.environ.get('TRAINING_N_JOBS', 1))
+
+# Model backends: 'forest' is the full 100-tree random forest; 'compact' is a
+# depth-limited forest flattened into arrays (FlatForest) for a small memory
+# footprint and fast single-row prediction. MODEL_BACKEND is the default and
+# MODEL_BACKENDS overrides it per type, e.g. "Pearl Millet:compact,Proso Millet:forest".
+MODEL_BACKEND_PARAMS = {
+    'forest': {'n_estimators': 100},
+    'compact': {'n_estimators': int(os.environ.get('COMPACT_TREES', 30)),
+                'max_depth': int(os.environ.get('COMPACT_MAX_DEPTH', 10)),
+                'min_samples_leaf': 2}
+}
+MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'forest')
+MODEL_BACKENDS = dict(
+    (part.strip() for part in entry.rsplit(':', 1))
+    for entry in os.environ.get('MODEL_BACKENDS', '').split(',') if ':' in entry
+)
+
+# Metadata of the artifact serving each millet type
+model_metadata = {}
+
+# Confidence intervals: 'noise' perturbs the scaled features INTERVAL_SAMPLES
+# times, 'trees' uses the spread of the forest's per-tree predictions
+INTERVAL_METHODS = ('noise', 'trees')
+INTERVAL_METHOD = os.environ.get('PREDICTION_INTERVAL_METHOD', 'noise')
+INTERVAL_SAMPLES = 100
+INTERVAL_NOISE_SCALE = 0.05
+INTERVAL_PERCENTILES = (25, 75)
 
-def initialize_models():
-    """Initialize ML models for different millet types"""
-    millet_types = ['Pearl Millet', 'Finger Millet', 'Foxtail Millet', 'Little Millet', 'Proso Millet']
+# /price-trend windows longer than this are averaged down to this many points
+TREND_MAX_POINTS = int(os.environ.get('TREND_MAX_POINTS', 120))
+
+# Largest number of forecasts one /predict-price/batch request may ask for
+BATCH_MAX_QUERIES = int(os.environ.get('BATCH_MAX_QUERIES', 10000))
+
+def generate_training_data(millet_type):
+    """Generate synthetic training data for a millet type"""
+    # Create sample data for demonstration
+    np.random.seed(42)
+    n_samples = 1000
     
-    for millet_type in millet_types:
-        # Create sample data for demonstration
-        np.random.seed(42)
-        n_samples = 1000
-        
-        # Generate synthetic features
-        data = {
-            'date': pd.date_range(start='2023-01-01', periods=n_samples, freq='D'),
-            'seasonal_factor': np.sin(2 * np.pi * np.arange(n_samples) / 365),
-            'demand_factor': np.random.normal(1.0, 0.2, n_samples),
-            'supply_factor': np.random.normal(1.0, 0.15, n_samples),
-            'weather_factor': np.random.normal(1.0, 0.1, n_samples),
-            'market_trend': np.linspace(1.0, 1.3, n_samples) + np.random.normal(0, 0.05, n_samples),
-            'government_subsidy': np.random.choice([0, 1], n_samples, p=[0.7, 0.3])
-        }
-        
-        # Generate target prices based on features
-        base_price = {
-            'Pearl Millet': 45,
-            'Finger Millet': 65,
-            'Foxtail Millet': 55,
-            'Little Millet': 50,
-            'Proso Millet': 48
-        }
-        
-        target = base_price[millet_type] * (
-            data['seasonal_factor'] * 
-            data['demand_factor'] * 
-            data['supply_factor'] * 
-            data['weather_factor'] * 
-            data['market_trend'] * 
-            (1 + data['government_subsidy'] * 0.1)
-        )
-        
-        # Create DataFrame
-        df = pd.DataFrame(data)
-        df['price'] = target
-        
-        # Prepare features
-        feature_columns = ['seasonal_factor', 'demand_factor', 'supply_factor', 
-                          'weather_factor', 'market_trend', 'government_subsidy']
-        X = df[feature_columns]
-        y = df['price']
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # Scale features
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        
-        # Train model
-        model = RandomForestRegressor(n_estimators=100, random_state=42)
-        model.fit(X_train_scaled, y_train)
-        
-        # Store model and scaler
+    # Generate synthetic features
+    data = {
+        'date': pd.date_range(start='2023-01-01', periods=n_samples, freq='D'),
+        'seasonal_factor': np.sin(2 * np.pi * np.arange(n_samples) / 365),
+        'demand_factor': np.random.normal(1.0, 0.2, n_samples),
+        'supply_factor': np.random.normal(1.0, 0.15, n_samples),
+        'weather_factor': np.random.normal(1.0, 0.1, n_samples),
+        'market_trend': np.linspace(1.0, 1.3, n_samples) + np.random.normal(0, 0.05, n_samples),
+        'government_subsidy': np.random.choice([0, 1], n_samples, p=[0.7, 0.3])
+    }
+    
+    # Generate target prices based on features
+    base_price = {
+        'Pearl Millet': 45,
+        'Finger Millet': 65,
+        'Foxtail Millet': 55,
+        'Little Millet': 50,
+        'Proso Millet': 48
+    }
+    
+    target = base_price[millet_type] * (
+        data['seasonal_factor'] * 
+        data['demand_factor'] * 
+        data['supply_factor'] * 
+        data['weather_factor'] * 
+        data['market_trend'] * 
+        (1 + data['government_subsidy'] * 0.1)
+    )
+    
+    # Create DataFrame
+    df = pd.DataFrame(data)
+    df['price'] = target
+    return df
+
+def read_market_prices(connection, millet_type, since=None):
+    """Yield a millet type's market_price rows dated on or after since, MARKET_CHUNK_SIZE rows at a time"""
+    query = 'SELECT state, district, date, price_per_kg FROM market_price WHERE millet_type = :millet_type'
+    params = {'millet_type': millet_type}
+    if since is not None:
+        query += ' AND date >= :since'
+        params['since'] = since
+    yield from pd.read_sql(text(query), connection, params=params,
+                           chunksize=MARKET_CHUNK_SIZE, parse_dates=['date'])
+
+def daily_market_prices(watermarks):
+    """Daily mean price per millet type, state and district from the rows on or after each type's watermark"""
+    partials = []
+    engine = create_engine(MARKET_DATA_URL)
+    try:
+        with engine.connect().execution_options(stream_results=True) as connection:
+            for millet_type, since in watermarks.items():
+                for chunk in read_market_prices(connection, millet_type, since):
+                    # Keep sums and counts so a day split across chunks averages correctly
+                    partial = chunk.groupby(['state', 'district', 'date'])['price_per_kg'].agg(['sum', 'count'])
+                    partials.append(partial.assign(millet_type=millet_type))
+    finally:
+        engine.dispose()
+    
+    columns = ['millet_type', 'state', 'district', 'date', 'price', 'observations']
+    if not partials:
+        return pd.DataFrame(columns=columns)
+    daily = pd.concat(partials).reset_index().groupby(['millet_type', 'state', 'district', 'date'])[['sum', 'count']].sum().reset_index()
+    daily['price'] = daily['sum'] / daily['count']
+    daily['observations'] = daily['count']
+    return daily[columns]
+
+def market_features(history, lags=MARKET_TRAINING_LAGS):
+    """Seasonal and lag features of every day of each state/district series, from that
+    series' earlier days; one row per day and lag so the model learns several horizons"""
+    frame = history.sort_values(['state', 'district', 'date'], ignore_index=True)
+    regions = [frame['state'], frame['district']]
+    series = frame.groupby(regions, sort=False)
+    
+    day_of_year = frame['date'].dt.dayofyear
+    frame['season_sin'] = np.sin(2 * np.pi * day_of_year / 365.25)
+    frame['season_cos'] = np.cos(2 * np.pi * day_of_year / 365.25)
+    
+    frames = []
+    for lag in lags:
+        lagged = frame.copy()
+        previous = series['price'].shift(lag)
+        lagged['last_price'] = previous
+        for window in (7, 30):
+            lagged[f'mean_price_{window}'] = previous.groupby(regions, sort=False).rolling(window, min_periods=1).mean().to_numpy()
+        lagged['days_since_last'] = (frame['date'] - series['date'].shift(lag)).dt.days
+        frames.append(lagged)
+    
+    # The first days of a series have nothing to look back on
+    return pd.concat(frames, ignore_index=True).dropna(subset=['last_price'])
+
+def latest_region_features(history):
+    """Last observed day, price and trailing means of each state/district series, for forecasting"""
+    frame = history.sort_values(['state', 'district', 'date'])
+    regions = frame.groupby(['state', 'district'])
+    latest = regions.agg(last_date=('date', 'last'), last_price=('price', 'last'))
+    for window in (7, 30):
+        latest[f'mean_price_{window}'] = frame.groupby(['state', 'district']).tail(window).groupby(['state', 'district'])['price'].mean()
+    return latest
+
+def market_forecast_features(latest, states, districts, days_ahead, current_date=None):
+    """Raw market feature matrix and prediction dates for (state, district, horizon) queries"""
+    days_ahead = np.asarray(days_ahead, dtype=np.int64)
+    current_date = current_date or datetime.now()
+    future_dates = np.datetime64(current_date.date(), 'D') + days_ahead
+    day_of_year = (future_dates - future_dates.astype('datetime64[Y]')).astype(np.int64) + 1
+    
+    # Districts without history take their state's averages, unknown states the millet type's
+    queries = pd.DataFrame({'state': states, 'district': districts})
+    rows = queries.join(latest, on=['state', 'district'])
+    lag_columns = ['last_price', 'mean_price_7', 'mean_price_30']
+    by_state = latest.groupby(level='state')
+    rows[lag_columns] = rows[lag_columns].fillna(queries[['state']].join(by_state[lag_columns].mean(), on='state')[lag_columns])
+    rows[lag_columns] = rows[lag_columns].fillna(latest[lag_columns].mean())
+    last_dates = rows['last_date'].fillna(queries['state'].map(by_state['last_date'].max()))
+    last_dates = last_dates.fillna(latest['last_date'].max()).to_numpy(dtype='datetime64[D]')
+    
+    features = np.column_stack([
+        np.sin(2 * np.pi * day_of_year / 365.25),
+        np.cos(2 * np.pi * day_of_year / 365.25),
+        rows[lag_columns].to_numpy(dtype=np.float64),
+        (future_dates - last_dates).astype(np.int64)
+    ])
+    return features, np.datetime_as_string(future_dates, unit='D')
+
+def proc_status_mb(field):
+    """A memory field of /proc/self/status (Linux) in MB, or None"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(f'{field}:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def max_rss_mb():
+    """Lifetime peak resident memory of this process in MB, or None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+def memory_baseline():
+    """Start measuring peak memory. On Linux the process high-water mark is reset
+    to the current RSS; elsewhere the lifetime peak so far is the baseline"""
+    # Return freed memory (e.g. a previously trained model) to the OS first, or
+    # the next fit reuses it without raising the resident size
+    gc.collect()
+    if malloc_trim is not None:
+        malloc_trim(0)
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return 'VmHWM', proc_status_mb('VmRSS')
+    except OSError:
+        return 'ru_maxrss', max_rss_mb()
+
+def peak_memory_mb(baseline):
+    """Peak resident memory in MB added since memory_baseline(), or None where it cannot be
+    measured. Without Linux's resettable high-water mark only growth past the process'
+    earlier peak registers, so the value is a lower bound there"""
+    source, start = baseline
+    peak = proc_status_mb('VmHWM') if source == 'VmHWM' else max_rss_mb()
+    if start is None or peak is None:
+        return None
+    return round(max(peak - start, 0), 1)
+
+def model_backend(millet_type):
+    """Backend configured for a millet type"""
+    return MODEL_BACKENDS.get(millet_type, MODEL_BACKEND)
+
+def train_model(millet_type, n_jobs=1, history=None, backend=None):
+    """Fit the price model for a millet type on its market history, or on synthetic
+    data when there is none; returns (model, scaler, history, metadata)"""
+    started = datetime.now()
+    backend = backend or model_backend(millet_type)
+    params = MODEL_BACKEND_PARAMS[backend]
+    if history is None:
+        df = generate_training_data(millet_type)
+        feature_set, feature_columns, training = 'synthetic', FEATURE_COLUMNS, df
+    else:
+        df = history
+        feature_set, feature_columns, training = 'market', MARKET_FEATURE_COLUMNS, market_features(history)
+    
+    # Prepare features
+    X = training[feature_columns].to_numpy()
+    y = training['price'].to_numpy()
+    
+    # Split data
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    
+    # Scale features
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+    
+    # Train model
+    model = RandomForestRegressor(random_state=42, n_jobs=n_jobs, **params)
+    baseline = memory_baseline()
+    fit_started = time.perf_counter()
+    model.fit(X_train_scaled, y_train)
+    fit_seconds = time.perf_counter() - fit_started
+    fit_memory_mb = peak_memory_mb(baseline)
+    if backend == 'compact':
+        model = FlatForest(model)
+    else:
+        # Serve single rows without spinning up parallel workers
+        model.set_params(n_jobs=None)
+    
+    metadata = {
+        'millet_type': millet_type,
+        'backend': backend,
+        'model_class': type(model).__name__,
+        'params': dict(params, random_state=42),
+        'feature_set': feature_set,
+        'feature_columns': feature_columns,
+        'training_samples': len(X_train),
+        'test_r2': round(float(r2_score(y_test, model.predict(X_test_scaled))), 4),
+        'training_seconds': round((datetime.now() - started).total_seconds(), 3),
+        'fit_seconds': round(fit_seconds, 3),
+        'fit_n_jobs': n_jobs,
+        'fit_peak_memory_mb': fit_memory_mb,
+        'sklearn_version': sklearn.__version__
+    }
+    if feature_set == 'market':
+        metadata['watermark'] = df['date'].max().strftime('%Y-%m-%d')
+        metadata['observations'] = int(df['observations'].sum())
+        metadata['regions'] = int(df.groupby(['state', 'district']).ngroups)
+    return model, scaler, df, metadata
+
+def millet_slug(millet_type):
+    return millet_type.lower().replace(' ', '-')
+
+def latest_version(millet_type):
+    """Version named by the registry's LATEST pointer, or None"""
+    pointer = os.path.join(MODEL_DIR, millet_slug(millet_type), 'LATEST')
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer) as f:
+        return f.read().strip() or None
+
+def save_artifact(millet_type, model, scaler, history, metadata):
+    """Write a new artifact version and point LATEST at it"""
+    series_dir = os.path.join(MODEL_DIR, millet_slug(millet_type))
+    version = datetime.now().strftime('%Y%m%d%H%M%S%f')
+    metadata = dict(metadata, version=version, created_at=datetime.now().isoformat())
+    
+    # Build the version in a temporary directory so readers never see a partial artifact
+    staging_dir = os.path.join(series_dir, f'.{version}.tmp')
+    os.makedirs(staging_dir)
+    joblib.dump(model, os.path.join(staging_dir, 'model.joblib'))
+    joblib.dump(scaler, os.path.join(staging_dir, 'scaler.joblib'))
+    joblib.dump(history, os.path.join(staging_dir, 'history.joblib'))
+    with open(os.path.join(staging_dir, 'metadata.json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(staging_dir, os.path.join(series_dir, version))
+    
+    pointer = os.path.join(series_dir, 'LATEST')
+    with open(pointer + '.tmp', 'w') as f:
+        f.write(version)
+    os.replace(pointer + '.tmp', pointer)
+    
+    # Drop old versions beyond the retention limit
+    versions = sorted(name for name in os.listdir(series_dir) if name.isdigit())
+    for old_version in versions[:-MODEL_KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(series_dir, old_version), ignore_errors=True)
+    return metadata
+
+def load_metadata(millet_type):
+    """Metadata of the latest artifact, or None"""
+    version = latest_version(millet_type)
+    if version is None:
+        return None
+    with open(os.path.join(MODEL_DIR, millet_slug(millet_type), version, 'metadata.json')) as f:
+        return json.load(f)
+
+def load_artifact(millet_type, version=None):
+    """Load a stored artifact. mmap_mode only helps the compact backend, whose
+    FlatForest is plain numpy arrays; scikit-learn trees copy their nodes on load"""
+    version = version or latest_version(millet_type)
+    if version is None:
+        return None
+    version_dir = os.path.join(MODEL_DIR, millet_slug(millet_type), version)
+    with open(os.path.join(version_dir, 'metadata.json')) as f:
+        metadata = json.load(f)
+    if metadata.get('sklearn_version') != sklearn.__version__:
+        print(f"Artifact {version} for {millet_type} was built with scikit-learn "
+              f"{metadata.get('sklearn_version')}, running {sklearn.__version__}")
+    model = joblib.load(os.path.join(version_dir, 'model.joblib'), mmap_mode='r')
+    scaler = joblib.load(os.path.join(version_dir, 'scaler.joblib'))
+    history = joblib.load(os.path.join(version_dir, 'history.joblib'))
+    return model, scaler, history, metadata
+
+def needs_training(millet_type, retrain=False):
+    """Whether a millet type has no artifact, or one built with a different backend than configured"""
+    metadata = None if retrain else load_metadata(millet_type)
+    return metadata is None or metadata.get('backend', 'forest') != model_backend(millet_type)
+
+def train_and_save(millet_type, n_jobs=1, history=None):
+    """Train a millet type's model and publish it to the registry; returns its metadata"""
+    model, scaler, history, metadata = train_model(millet_type, n_jobs, history)
+    return save_artifact(millet_type, model, scaler, history, metadata)
+
+def train_models(millet_types, cores=None, n_jobs=None, histories=None):
+    """Train and publish several millet types, fanning out across worker processes"""
+    cores = cores or TRAINING_CORES
+    n_jobs = max(1, min(n_jobs or TRAINING_N_JOBS, cores))
+    workers = max(1, min(len(millet_types), cores // n_jobs))
+    histories = histories or {}
+    tasks = [(millet_type, n_jobs, histories.get(millet_type)) for millet_type in millet_types]
+    started = time.perf_counter()
+    if workers == 1:
+        results = [train_and_save(*task) for task in tasks]
+    else:
+        # A fresh process per model returns its memory to the OS once it is saved.
+        # Forked workers start with the libraries already imported, but forking while
+        # other threads run (the market refresher, the insights refresher) can copy a
+        # lock some thread holds, so only the single-threaded startup path forks
+        start_methods = multiprocessing.get_all_start_methods()
+        if 'fork' in start_methods and threading.active_count() == 1:
+            start_method = 'fork'
+        else:
+            start_method = 'forkserver' if 'forkserver' in start_methods else 'spawn'
+        with multiprocessing.get_context(start_method).Pool(workers, maxtasksperchild=1) as pool:
+            results = pool.starmap(train_and_save, tasks)
+    
+    for metadata in results:
+        print(f"Model trained for {metadata['millet_type']} (version {metadata['version']}): "
+              f"fit {metadata['fit_seconds']}s, fit peak memory +{metadata['fit_peak_memory_mb']} MB")
+    print(f"Trained {len(results)} models in {time.perf_counter() - started:.2f}s "
+          f"({workers} processes x {n_jobs} jobs)")
+    return results
+
+def refresh_market_models(retrain=False):
+    """Fold market_price rows past each millet type's watermark into its history and
+    retrain the types whose data changed; returns the retrained millet types"""
+    watermarks = {}
+    histories = {}
+    for millet_type in MILLET_TYPES:
+        metadata = None if needs_training(millet_type, retrain) else load_metadata(millet_type)
+        if metadata and metadata.get('feature_set') == 'market':
+            watermarks[millet_type] = metadata['watermark']
+            histories[millet_type] = load_artifact(millet_type)[2]
+        else:
+            watermarks[millet_type] = None
+    
+    daily = daily_market_prices(watermarks)
+    changed = {}
+    for millet_type, new_days in daily.groupby('millet_type'):
+        new_days = new_days.drop(columns='millet_type').reset_index(drop=True)
+        if millet_type in histories:
+            # The watermark day is read again in full, in case rows arrived after the last refresh
+            history = histories[millet_type]
+            watermark_day = history['date'] == pd.Timestamp(watermarks[millet_type])
+            if len(new_days) == watermark_day.sum() and (new_days['date'] == pd.Timestamp(watermarks[millet_type])).all():
+                previous = history[watermark_day].sort_values(['state', 'district'], ignore_index=True)
+                current = new_days.sort_values(['state', 'district'], ignore_index=True)
+                if previous[['state', 'district', 'observations']].equals(current[['state', 'district', 'observations']]) \
+                        and np.allclose(previous['price'], current['price']):
+                    continue
+            new_days = pd.concat([history[~watermark_day], new_days], ignore_index=True)
+        if len(new_days) >= MARKET_MIN_DAYS:
+            changed[millet_type] = new_days
+    
+    if changed:
+        train_models(list(changed), histories=changed)
+    return list(changed)
+
+def install_model(millet_type, model, scaler, history, metadata):
+    """Start serving an artifact for a millet type"""
+    trend = build_trend_columns(history)
+    latest = latest_region_features(history) if metadata.get('feature_set') == 'market' else None
+    with models_lock:
+        # Store model, scaler and historical data
         models[millet_type] = model
         scalers[millet_type] = scaler
-        
-        # Store historical data
-        price_data[millet_type] = df
-        
-        print(f"Model trained for {millet_type}")
+        price_data[millet_type] = history
+        trend_columns[millet_type] = trend
+        region_latest[millet_type] = latest
+        model_metadata[millet_type] = metadata
+
+def serving_model(millet_type):
+    """The model, scaler, metadata and latest regional prices serving a millet type, read together"""
+    with models_lock:
+        return models[millet_type], scalers[millet_type], model_metadata[millet_type], region_latest[millet_type]
+
+def initialize_models(retrain=False):
+    """Load ML models for every millet type, training only those without an artifact;
+    with MARKET_DATA_URL set, types with enough market history are trained on it"""
+    refreshed = refresh_market_models(retrain) if MARKET_DATA_URL else []
+    missing = [millet_type for millet_type in MILLET_TYPES if millet_type not in refreshed
+               and needs_training(millet_type, retrain)]
+    if missing:
+        train_models(missing)
+    
+    for millet_type in MILLET_TYPES:
+        model, scaler, history, metadata = load_artifact(millet_type)
+        print(f"Model loaded for {millet_type} (version {metadata['version']}, "
+              f"{metadata.get('backend', 'forest')} backend, {metadata.get('feature_set', 'synthetic')} features)")
+        install_model(millet_type, model, scaler, history, metadata)
+
+def run_market_refresher(interval):
+    """Pick up new market prices every interval seconds and serve the retrained models"""
+    while True:
+        time.sleep(interval)
+        try:
+            refreshed = refresh_market_models()
+            for millet_type in refreshed:
+                install_model(millet_type, *load_artifact(millet_type))
+            if refreshed:
+                insights_refresher.refresh()
+        except Exception as e:
+            print(f"Market model refresh failed: {e}")
+
+def forecast_features(days_ahead, current_date=None):
+    """Raw feature matrix and prediction dates for an array of forecast horizons"""
+    days_ahead = np.asarray(days_ahead, dtype=np.int64)
+    n_rows = len(days_ahead)
+    current_date = current_date or datetime.now()
+    future_dates = np.datetime64(current_date.date(), 'D') + days_ahead
+    
+    # Calculate seasonal factor
+    day_of_year = (future_dates - future_dates.astype('datetime64[Y]')).astype(np.int64) + 1
+    
+    # Simulate other factors (in real implementation, these would come from external APIs)
+    features = np.column_stack([
+        np.sin(2 * np.pi * day_of_year / 365),
+        np.random.normal(1.0, 0.2, n_rows),
+        np.random.normal(1.0, 0.15, n_rows),
+        np.random.normal(1.0, 0.1, n_rows),
+        1.0 + (days_ahead * 0.001),  # Slight upward trend
+        np.random.choice([0, 1], n_rows, p=[0.7, 0.3])
+    ])
+    return features, np.datetime_as_string(future_dates, unit='D')
+
+def query_features(metadata, latest, states, districts, days_ahead):
+    """Raw feature matrix and prediction dates for forecasts under a model's feature set"""
+    if metadata.get('feature_set') == 'market':
+        return market_forecast_features(latest, states, districts, days_ahead)
+    return forecast_features(days_ahead)
+
+def predict_with_interval(model, features_scaled, method=INTERVAL_METHOD):
+    """Predict each row of features_scaled with one vectorized pass; returns (prices, lower, upper)"""
+    n_rows = features_scaled.shape[0]
+    if method == 'trees':
+        # Every tree's prediction for every row; the forest's prediction is their mean
+        if isinstance(model, FlatForest):
+            samples = model.predict_trees(features_scaled)
+        elif isinstance(model, RandomForestRegressor):
+            features_tree = np.ascontiguousarray(features_scaled, dtype=np.float32)
+            samples = np.column_stack([tree.predict(features_tree, check_input=False)
+                                       for tree in model.estimators_])
+        else:
+            raise ValueError(f'Interval method trees needs a forest model, not {type(model).__name__}')
+        prices = samples.mean(axis=1)
+    else:
+        # The rows themselves followed by INTERVAL_SAMPLES noisy copies of each, in one predict call
+        noise = np.random.normal(0, INTERVAL_NOISE_SCALE, (n_rows, INTERVAL_SAMPLES, features_scaled.shape[1]))
+        noisy = (features_scaled[:, np.newaxis, :] + noise).reshape(-1, features_scaled.shape[1])
+        predictions = model.predict(np.vstack([features_scaled, noisy]))
+        prices = predictions[:n_rows]
+        samples = predictions[n_rows:].reshape(n_rows, INTERVAL_SAMPLES)
+    lower, upper = np.percentile(samples, INTERVAL_PERCENTILES, axis=1)
+    return prices, lower, upper
 
 @app.route('/predict-price', methods=['POST'])
 def predict_price():
@@ -95,6 +585,7 @@ def predict_price():
         days_ahead = data.get('days_ahead', 7)
         state = data.get('state', 'Bihar')
         district = data.get('district', 'Muzaffarpur')
+        interval_method = data.get('interval', INTERVAL_METHOD)
         
         if not millet_type:
             return jsonify({'error': 'Millet type is required'}), 400
@@ -102,63 +593,31 @@ def predict_price():
         if millet_type not in models:
             return jsonify({'error': f'Model not available for {millet_type}'}), 400
         
-        # Get current date
-        current_date = datetime.now()
-        future_date = current_date + timedelta(days=days_ahead)
-        
-        # Calculate seasonal factor
-        day_of_year = future_date.timetuple().tm_yday
-        seasonal_factor = np.sin(2 * np.pi * day_of_year / 365)
-        
-        # Simulate other factors (in real implementation, these would come from external APIs)
-        demand_factor = np.random.normal(1.0, 0.2)
-        supply_factor = np.random.normal(1.0, 0.15)
-        weather_factor = np.random.normal(1.0, 0.1)
-        market_trend = 1.0 + (days_ahead * 0.001)  # Slight upward trend
-        government_subsidy = np.random.choice([0, 1], p=[0.7, 0.3])
+        if interval_method not in INTERVAL_METHODS:
+            return jsonify({'error': f"Interval must be one of {', '.join(INTERVAL_METHODS)}"}), 400
         
         # Prepare features
-        features = np.array([[
-            seasonal_factor,
-            demand_factor,
-            supply_factor,
-            weather_factor,
-            market_trend,
-            government_subsidy
-        ]])
+        model, scaler, metadata, latest = serving_model(millet_type)
+        features, prediction_dates = query_features(metadata, latest, [state], [district], [days_ahead])
+        factors = {name: round(float(value), 3)
+                   for name, value in zip(metadata.get('feature_columns', FEATURE_COLUMNS), features[0])}
+        if 'government_subsidy' in factors:
+            factors['government_subsidy'] = int(factors['government_subsidy'])
         
         # Scale features
-        features_scaled = scalers[millet_type].transform(features)
-        
-        # Make prediction
-        predicted_price = models[millet_type].predict(features_scaled)[0]
-        
-        # Get confidence interval
-        predictions = []
-        for _ in range(100):
-            # Add some randomness for confidence interval
-            noise = np.random.normal(0, 0.05, features.shape)
-            features_noisy = features_scaled + noise
-            pred = models[millet_type].predict(features_noisy)[0]
-            predictions.append(pred)
+        features_scaled = scaler.transform(features)
         
-        confidence_lower = np.percentile(predictions, 25)
-        confidence_upper = np.percentile(predictions, 75)
+        # Make prediction with its confidence interval
+        prices, lower, upper = predict_with_interval(model, features_scaled, interval_method)
         
         return jsonify({
             'millet_type': millet_type,
-            'predicted_price': round(predicted_price, 2),
-            'confidence_lower': round(confidence_lower, 2),
-            'confidence_upper': round(confidence_upper, 2),
-            'prediction_date': future_date.strftime('%Y-%m-%d'),
-            'factors': {
-                'seasonal_factor': round(seasonal_factor, 3),
-                'demand_factor': round(demand_factor, 3),
-                'supply_factor': round(supply_factor, 3),
-                'weather_factor': round(weather_factor, 3),
-                'market_trend': round(market_trend, 3),
-                'government_subsidy': government_subsidy
-            },
+            'predicted_price': round(float(prices[0]), 2),
+            'confidence_lower': round(float(lower[0]), 2),
+            'confidence_upper': round(float(upper[0]), 2),
+            'interval_method': interval_method,
+            'prediction_date': str(prediction_dates[0]),
+            'factors': factors,
             'location': {
                 'state': state,
                 'district': district
@@ -168,6 +627,169 @@ def predict_price():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def batch_queries(data):
+    """Expand a batch request into columns (millet_types, states, districts, days_ahead)"""
+    if 'queries' in data:
+        queries = data['queries']
+        if not isinstance(queries, list) or not all(isinstance(query, dict) for query in queries):
+            raise ValueError('queries must be a list of objects')
+        return ([query.get('millet_type') for query in queries],
+                [query.get('state', 'Bihar') for query in queries],
+                [query.get('district', 'Muzaffarpur') for query in queries],
+                [query.get('days_ahead', 7) for query in queries])
+    
+    # Cartesian product of the grid's millet types, locations and horizons
+    grid = data.get('grid', {})
+    if not isinstance(grid, dict):
+        raise ValueError('grid must be an object')
+    millet_types = grid.get('millet_types', list(models.keys()))
+    locations = grid.get('locations', [{'state': 'Bihar', 'district': 'Muzaffarpur'}])
+    horizons = grid.get('days_ahead', [7])
+    for axis, values in (('millet_types', millet_types), ('locations', locations), ('days_ahead', horizons)):
+        if not isinstance(values, list) or not values:
+            raise ValueError(f'grid.{axis} must be a non-empty list')
+    if not all(isinstance(millet_type, str) for millet_type in millet_types):
+        raise ValueError('grid.millet_types must be a list of names')
+    if not all(isinstance(location, dict) for location in locations):
+        raise ValueError('grid.locations must be a list of objects')
+    combinations = len(millet_types) * len(locations) * len(horizons)
+    if combinations > BATCH_MAX_QUERIES:
+        raise ValueError(f'Batch of {combinations} forecasts exceeds the limit of {BATCH_MAX_QUERIES}')
+    columns = ([], [], [], [])
+    for millet_type in millet_types:
+        for location in locations:
+            for days_ahead in horizons:
+                columns[0].append(millet_type)
+                columns[1].append(location.get('state', 'Bihar'))
+                columns[2].append(location.get('district', 'Muzaffarpur'))
+                columns[3].append(days_ahead)
+    return columns
+
+@app.route('/predict-price/batch', methods=['POST'])
+def predict_price_batch():
+    """Forecast many (millet type, location, horizon) combinations with one predict per model"""
+    try:
+        data = request.get_json()
+        interval_method = data.get('interval', INTERVAL_METHOD)
+        
+        if interval_method not in INTERVAL_METHODS:
+            return jsonify({'error': f"Interval must be one of {', '.join(INTERVAL_METHODS)}"}), 400
+        
+        try:
+            millet_types, states, districts, days_ahead = batch_queries(data)
+        except (AttributeError, TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if len(millet_types) > BATCH_MAX_QUERIES:
+            return jsonify({'error': f'Batch of {len(millet_types)} forecasts exceeds the limit of {BATCH_MAX_QUERIES}'}), 400
+        
+        unknown = sorted({str(millet_type) for millet_type in millet_types
+                          if not isinstance(millet_type, str) or millet_type not in models})
+        if unknown:
+            return jsonify({'error': f"Model not available for {', '.join(unknown)}"}), 400
+        
+        if not all(isinstance(days, int) and 0 <= days <= 365 for days in days_ahead):
+            return jsonify({'error': 'days_ahead must be whole days between 0 and 365'}), 400
+        
+        prediction_dates = np.empty(len(millet_types), dtype=object)
+        prices = np.empty(len(millet_types))
+        lower = np.empty(len(millet_types))
+        upper = np.empty(len(millet_types))
+        
+        # One feature matrix, scale and predict per model over all of its rows
+        millet_column = np.array(millet_types, dtype=object)
+        state_column = np.array(states, dtype=object)
+        district_column = np.array(districts, dtype=object)
+        days_column = np.array(days_ahead, dtype=np.int64)
+        for millet_type in set(millet_types):
+            rows = np.flatnonzero(millet_column == millet_type)
+            model, scaler, metadata, latest = serving_model(millet_type)
+            features, prediction_dates[rows] = query_features(
+                metadata, latest, state_column[rows], district_column[rows], days_column[rows])
+            prices[rows], lower[rows], upper[rows] = predict_with_interval(
+                model, scaler.transform(features), interval_method)
+        
+        return jsonify({
+            'count': len(millet_types),
+            'interval_method': interval_method,
+            'columns': {
+                'millet_type': millet_types,
+                'state': states,
+                'district': districts,
+                'days_ahead': days_ahead,
+                'prediction_date': prediction_dates.tolist(),
+                'predicted_price': np.round(prices, 2).tolist(),
+                'confidence_lower': np.round(lower, 2).tolist(),
+                'confidence_upper': np.round(upper, 2).tolist()
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def build_trend_columns(history):
+    """Column arrays of a price history, with dates formatted once up front"""
+    if 'state' in history.columns:
+        # Market history: one observation-weighted average price per day across all regions
+        totals = history.assign(total=history['price'] * history['observations']).groupby('date')[['total', 'observations']].sum()
+        history = pd.DataFrame({'date': totals.index, 'price': totals['total'] / totals['observations']})
+    columns = {
+        'date': history['date'].dt.strftime('%Y-%m-%d').to_numpy(dtype=object),
+        'price': history['price'].to_numpy(dtype=np.float64)
+    }
+    for name in ('demand_factor', 'supply_factor'):
+        if name in history.columns:
+            columns[name] = history[name].to_numpy(dtype=np.float64)
+    return columns
+
+def downsample(columns, max_points):
+    """Average consecutive points into at most max_points buckets, each dated by its last day"""
+    n_points = len(columns['price'])
+    bucket_size = -(-n_points // max_points)
+    # Align buckets to the end of the window so the latest point closes the last bucket
+    ends = np.arange(n_points, 0, -bucket_size)[::-1]
+    starts = np.maximum(ends - bucket_size, 0)
+    counts = ends - starts
+    sampled = {'date': columns['date'][ends - 1]}
+    for name, values in columns.items():
+        if name != 'date':
+            sampled[name] = np.add.reduceat(values, starts) / counts
+    return sampled, bucket_size
+
+def price_trend(millet_type, days=30, max_points=None, columnar=False):
+    """Recent price trend of a millet type, optionally downsampled to max_points"""
+    history = trend_columns[millet_type]
+    window = {name: values[-days:] for name, values in history.items()}
+    prices = window['price']
+    
+    # Calculate trend direction over the last week of daily prices
+    recent_prices = np.round(prices[-7:], 2)
+    if len(recent_prices) >= 2:
+        trend_direction = 'up' if recent_prices[-1] > recent_prices[0] else 'down'
+        price_change_percent = round(float((recent_prices[-1] - recent_prices[0]) / recent_prices[0]) * 100, 2)
+    else:
+        trend_direction = 'stable'
+        price_change_percent = 0
+    
+    resolution_days = 1
+    if max_points and len(prices) > max_points:
+        window, resolution_days = downsample(window, max_points)
+    
+    trend_data = {name: values.tolist() if name == 'date' else np.round(values, 2 if name == 'price' else 3).tolist()
+                  for name, values in window.items()}
+    if not columnar:
+        names = list(trend_data)
+        trend_data = [dict(zip(names, row)) for row in zip(*trend_data.values())]
+    
+    return {
+        'millet_type': millet_type,
+        'trend_direction': trend_direction,
+        'current_price': round(float(prices[-1]), 2) if len(prices) else 0,
+        'price_change_percent': price_change_percent,
+        'resolution_days': resolution_days,
+        'data': trend_data
+    }
+
 @app.route('/price-trend', methods=['POST'])
 def get_price_trend():
     """Get price trend for a millet type"""
@@ -175,45 +797,171 @@ def get_price_trend():
         data = request.get_json()
         millet_type = data.get('millet_type')
         days = data.get('days', 30)
+        max_points = data.get('max_points', TREND_MAX_POINTS)
+        response_format = data.get('format', 'records')
         
         if not millet_type:
             return jsonify({'error': 'Millet type is required'}), 400
         
-        if millet_type not in price_data:
+        if millet_type not in trend_columns:
             return jsonify({'error': f'Data not available for {millet_type}'}), 400
         
-        # Get recent data
-        df = price_data[millet_type].tail(days)
+        if not isinstance(days, int) or days < 1:
+            return jsonify({'error': 'days must be a positive whole number'}), 400
         
-        trend_data = []
-        for _, row in df.iterrows():
-            trend_data.append({
-                'date': row['date'].strftime('%Y-%m-%d'),
-                'price': round(row['price'], 2),
-                'demand_factor': round(row['demand_factor'], 3),
-                'supply_factor': round(row['supply_factor'], 3)
-            })
+        if max_points is not None and (not isinstance(max_points, int) or max_points < 1):
+            return jsonify({'error': 'max_points must be a positive whole number'}), 400
         
-        # Calculate trend direction
-        recent_prices = [item['price'] for item in trend_data[-7:]]
-        if len(recent_prices) >= 2:
-            trend_direction = 'up' if recent_prices[-1] > recent_prices[0] else 'down'
-        else:
-            trend_direction = 'stable'
+        if response_format not in ('records', 'columns'):
+            return jsonify({'error': 'format must be records or columns'}), 400
         
-        return jsonify({
-            'millet_type': millet_type,
-            'trend_direction': trend_direction,
-            'current_price': trend_data[-1]['price'] if trend_data else 0,
-            'price_change_percent': round(
-                ((recent_prices[-1] - recent_prices[0]) / recent_prices[0]) * 100, 2
-            ) if len(recent_prices) >= 2 else 0,
-            'data': trend_data
-        })
+        return jsonify(price_trend(millet_type, days, max_points, columnar=response_format == 'columns'))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def national_current_prices():
+    """Current price of every millet type from its price trend"""
+    return {millet_type: price_trend(millet_type, 7)['current_price'] for millet_type in list(trend_columns.keys())}
+
+def state_current_prices(state):
+    """Mean latest market price across a state's districts, for the millet types trained on regional history"""
+    with models_lock:
+        latest_by_type = dict(region_latest)
+    prices = {}
+    for millet_type, latest in latest_by_type.items():
+        if latest is None:
+            continue
+        in_state = latest.loc[latest.index.get_level_values('state') == state, 'last_price']
+        if len(in_state):
+            prices[millet_type] = float(in_state.mean())
+    return prices
+
+def compute_market_insights(state, national_prices=None):
+    """Build the market insights for a state: its own latest market prices where the
+    models were trained on regional history, the national price trend otherwise"""
+    national_prices = national_prices if national_prices is not None else national_current_prices()
+    state_prices = state_current_prices(state)
+    insights = {
+        'best_selling_millets': [],
+        'price_recommendations': {},
+        'market_conditions': {},
+        'seasonal_advice': {}
+    }
+    
+    # Analyze each millet type
+    for millet_type, national_price in national_prices.items():
+        current_price = state_prices.get(millet_type, national_price)
+        
+        # Calculate recommended selling price (5% markup)
+        recommended_price = current_price * 1.05
+        
+        insights['price_recommendations'][millet_type] = {
+            'current_market_price': round(current_price, 2),
+            'recommended_selling_price': round(recommended_price, 2),
+            'profit_margin': round(recommended_price - current_price, 2),
+            'price_source': 'state' if millet_type in state_prices else 'national'
+        }
+        
+        # Add to best selling list
+        insights['best_selling_millets'].append({
+            'millet_type': millet_type,
+            'current_price': round(current_price, 2),
+            'profit_potential': round(recommended_price - current_price, 2)
+        })
+    
+    # Sort by profit potential
+    insights['best_selling_millets'].sort(key=lambda x: x['profit_potential'], reverse=True)
+    
+    # Market conditions
+    insights['market_conditions'] = {
+        'demand_level': 'High',
+        'supply_level': 'Moderate',
+        'market_trend': 'Bullish',
+        'recommended_action': 'Consider selling now for better profits'
+    }
+    
+    # Seasonal advice
+    current_month = datetime.now().month
+    if current_month in [10, 11, 12, 1]:  # Harvest season
+        insights['seasonal_advice'] = {
+            'season': 'Harvest Season',
+            'advice': 'Best time to sell fresh harvest. Prices are typically higher.',
+            'recommendation': 'List your products now for maximum profit'
+        }
+    elif current_month in [6, 7, 8, 9]:  # Monsoon season
+        insights['seasonal_advice'] = {
+            'season': 'Monsoon Season',
+            'advice': 'Storage and quality are crucial. Consider processing options.',
+            'recommendation': 'Focus on quality preservation and storage'
+        }
+    else:
+        insights['seasonal_advice'] = {
+            'season': 'Off Season',
+            'advice': 'Limited fresh supply. Processed products may have better demand.',
+            'recommendation': 'Consider value-added products'
+        }
+    
+    insights['state'] = state
+    insights['generated_at'] = datetime.now().isoformat()
+    return insights
+
+class InsightsRefresher:
+    """Keeps a per-state snapshot of market insights, rebuilt on a schedule by a daemon thread"""
+    
+    def __init__(self, states, interval, max_states=64):
+        self.states = set(states)
+        self.interval = interval
+        self.max_states = max_states
+        self.snapshot = {}
+        self.generated_at = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+    
+    def refresh(self):
+        """Recompute insights for every known state and swap in the new snapshot"""
+        with self.lock:
+            states = sorted(self.states)
+        # The national trend is shared by every state; only regional prices differ
+        national_prices = national_current_prices()
+        snapshot = {state: compute_market_insights(state, national_prices) for state in states}
+        with self.lock:
+            self.snapshot = snapshot
+            self.generated_at = datetime.now().isoformat()
+    
+    def get(self, state):
+        """Insights for a state; a state seen for the first time is computed now and refreshed from then on"""
+        insights = self.snapshot.get(state)
+        if insights is None:
+            insights = compute_market_insights(state)
+            with self.lock:
+                if len(self.states) >= self.max_states:
+                    return insights
+                self.states.add(state)
+                self.snapshot = dict(self.snapshot, **{state: insights})
+        return insights
+    
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Market insights refresh failed: {e}")
+    
+    def start(self):
+        self.refresh()
+        self.thread = threading.Thread(target=self.run, name='insights-refresher', daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        self.stop_event.set()
+
+insights_refresher = InsightsRefresher(
+    [state.strip() for state in os.environ.get('INSIGHTS_STATES', 'Bihar').split(',') if state.strip()],
+    int(os.environ.get('INSIGHTS_REFRESH_SECONDS', 3600))
+)
+
 @app.route('/market-insights', methods=['POST'])
 def get_market_insights():
     """Get comprehensive market insights"""
@@ -221,71 +969,7 @@ def get_market_insights():
         data = request.get_json()
         state = data.get('state', 'Bihar')
         
-        insights = {
-            'best_selling_millets': [],
-            'price_recommendations': {},
-            'market_conditions': {},
-            'seasonal_advice': {}
-        }
-        
-        # Analyze each millet type
-        for millet_type in models.keys():
-            # Get current trend
-            trend_response = get_price_trend()
-            trend_data = trend_response.get_json()
-            
-            if trend_data and 'current_price' in trend_data:
-                current_price = trend_data['current_price']
-                
-                # Calculate recommended selling price (5% markup)
-                recommended_price = current_price * 1.05
-                
-                insights['price_recommendations'][millet_type] = {
-                    'current_market_price': round(current_price, 2),
-                    'recommended_selling_price': round(recommended_price, 2),
-                    'profit_margin': round(recommended_price - current_price, 2)
-                }
-                
-                # Add to best selling list
-                insights['best_selling_millets'].append({
-                    'millet_type': millet_type,
-                    'current_price': round(current_price, 2),
-                    'profit_potential': round(recommended_price - current_price, 2)
-                })
-        
-        # Sort by profit potential
-        insights['best_selling_millets'].sort(key=lambda x: x['profit_potential'], reverse=True)
-        
-        # Market conditions
-        insights['market_conditions'] = {
-            'demand_level': 'High',
-            'supply_level': 'Moderate',
-            'market_trend': 'Bullish',
-            'recommended_action': 'Consider selling now for better profits'
-        }
-        
-        # Seasonal advice
-        current_month = datetime.now().month
-        if current_month in [10, 11, 12, 1]:  # Harvest season
-            insights['seasonal_advice'] = {
-                'season': 'Harvest Season',
-                'advice': 'Best time to sell fresh harvest. Prices are typically higher.',
-                'recommendation': 'List your products now for maximum profit'
-            }
-        elif current_month in [6, 7, 8, 9]:  # Monsoon season
-            insights['seasonal_advice'] = {
-                'season': 'Monsoon Season',
-                'advice': 'Storage and quality are crucial. Consider processing options.',
-                'recommendation': 'Focus on quality preservation and storage'
-            }
-        else:
-            insights['seasonal_advice'] = {
-                'season': 'Off Season',
-                'advice': 'Limited fresh supply. Processed products may have better demand.',
-                'recommendation': 'Consider value-added products'
-            }
-        
-        return jsonify(insights)
+        return jsonify(insights_refresher.get(state))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -297,12 +981,22 @@ def health_check():
         'status': 'healthy',
         'models_loaded': len(models),
         'millet_types': list(models.keys()),
+        'model_versions': {millet_type: metadata['version'] for millet_type, metadata in model_metadata.items()},
+        'model_backends': {millet_type: metadata.get('backend', 'forest') for millet_type, metadata in model_metadata.items()},
+        'insights_generated_at': insights_refresher.generated_at,
         'timestamp': datetime.now().isoformat()
     })
 
 if __name__ == '__main__':
     print("Initializing AI Price Prediction Service...")
-    initialize_models()
+    initialize_models(retrain=os.environ.get('MODEL_RETRAIN', '').lower() == 'true')
     print("Models initialized successfully!")
+    # debug=True runs this module twice (reloader parent and serving child);
+    # background work belongs to the child only
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        insights_refresher.start()
+        if MARKET_DATA_URL and MARKET_REFRESH_SECONDS > 0:
+            threading.Thread(target=run_market_refresher, args=(MARKET_REFRESH_SECONDS,),
+                             name='market-refresher', daemon=True).start()
     print("Starting Flask server...")
     app.run(debug=True, host='0.0.0.0', port=5001)
@@ -0,0 +1,90 @@
+"""Compare accuracy, size and prediction latency of the model backends.
+
+Usage (from the ai-service directory):
+    python benchmarks/model_backends.py --millet-type "Pearl Millet"
+
+Fits the full forest and the compact backend on the same synthetic training
+data (or on market history when MARKET_DATA_URL is set and the millet type
+has enough of it), plus the full forest flattened into a FlatForest, and
+reports test R2, artifact size on disk and p50/p99 latency of single-row
+predictions, single-row per-tree intervals and a 1000-row batch.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+os.environ.setdefault('MODEL_DIR', tempfile.mkdtemp())
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
+
+from app import (MARKET_DATA_URL, MARKET_FEATURE_COLUMNS, FEATURE_COLUMNS, FlatForest, daily_market_prices,
+                 generate_training_data, market_features, predict_with_interval, train_model)
+
+
+def training_data(millet_type):
+    """The rows train_model fits on, as (history, X, y)"""
+    if MARKET_DATA_URL:
+        history = daily_market_prices({millet_type: None}).drop(columns='millet_type')
+        if len(history):
+            training = market_features(history)
+            return history, training[MARKET_FEATURE_COLUMNS].to_numpy(), training['price'].to_numpy()
+    df = generate_training_data(millet_type)
+    return None, df[FEATURE_COLUMNS].to_numpy(), df['price'].to_numpy()
+
+
+def latency(fn, count):
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return np.percentile(samples, 50) * 1e6, np.percentile(samples, 99) * 1e6
+
+
+def artifact_bytes(model):
+    path = os.path.join(tempfile.mkdtemp(), 'model.joblib')
+    joblib.dump(model, path)
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--millet-type', default='Pearl Millet')
+    parser.add_argument('--calls', type=int, default=500)
+    args = parser.parse_args()
+
+    history, X, y = training_data(args.millet_type)
+    # train_model splits the same way, so this is its held-out set
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    forest, scaler, _, _ = train_model(args.millet_type, history=history, backend='forest')
+    compact, _, _, _ = train_model(args.millet_type, history=history, backend='compact')
+    backends = [('forest', forest), ('forest, flattened', FlatForest(forest)), ('compact', compact)]
+
+    X_test_scaled = scaler.transform(X_test)
+    row = X_test_scaled[:1]
+    batch = X_test_scaled[np.arange(1000) % len(X_test_scaled)]
+
+    print(f"\n{args.millet_type}, {'market' if history is not None else 'synthetic'} data, "
+          f"{len(X_test)} test rows; latency in microseconds")
+    print(f"  {'backend':<18} {'test R2':>8} {'size KB':>9} {'1 row p50':>10} {'p99':>9} "
+          f"{'trees p50':>10} {'p99':>9} {'1000 p50':>10} {'p99':>9}")
+    for name, model in backends:
+        r2 = r2_score(y_test, model.predict(X_test_scaled))
+        size = artifact_bytes(model) / 1024
+        single = latency(lambda: model.predict(row), args.calls)
+        interval = latency(lambda: predict_with_interval(model, row, 'trees'), args.calls)
+        many = latency(lambda: model.predict(batch), max(args.calls // 10, 10))
+        print(f"  {name:<18} {r2:>8.4f} {size:>9.0f} {single[0]:>10.0f} {single[1]:>9.0f} "
+              f"{interval[0]:>10.0f} {interval[1]:>9.0f} {many[0]:>10.0f} {many[1]:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Compare /predict-price latency for each confidence interval method.
+
+Usage (from the ai-service directory):
+    python benchmarks/predict_latency.py --requests 500
+
+Trains (or loads, when MODEL_DIR points at an existing registry) the Pearl
+Millet model and times the old interval loop of 100 sequential predicts
+against the batched noise predict and the per-tree spread, first on the
+interval computation alone and then through full requests to the endpoint.
+Reports p50/p99 latency in milliseconds.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+os.environ.setdefault('MODEL_DIR', tempfile.mkdtemp())
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, initialize_models, models, scalers, predict_with_interval, INTERVAL_METHODS
+
+MILLET_TYPE = 'Pearl Millet'
+
+
+def legacy_interval(model, features_scaled):
+    """The old path: one predict for the price and one per noise sample"""
+    predicted_price = model.predict(features_scaled)[0]
+    predictions = []
+    for _ in range(100):
+        noise = np.random.normal(0, 0.05, features_scaled.shape)
+        predictions.append(model.predict(features_scaled + noise)[0])
+    return predicted_price, np.percentile(predictions, 25), np.percentile(predictions, 75)
+
+
+def percentiles(samples):
+    samples = np.array(samples) * 1000
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def timed(fn, count):
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    initialize_models()
+    model, scaler = models[MILLET_TYPE], scalers[MILLET_TYPE]
+    features_scaled = scaler.transform(np.array([[0.5, 1.0, 1.0, 1.0, 1.01, 0]]))
+
+    print(f"\ninterval computation, {args.requests} calls")
+    print(f"  {'method':<24} {'p50 ms':>8} {'p99 ms':>8}")
+    p50, p99 = timed(lambda: legacy_interval(model, features_scaled), args.requests)
+    print(f"  {'legacy 101 predicts':<24} {p50:>8.2f} {p99:>8.2f}")
+    for method in INTERVAL_METHODS:
+        p50, p99 = timed(lambda: predict_with_interval(model, features_scaled, method), args.requests)
+        print(f"  {method:<24} {p50:>8.2f} {p99:>8.2f}")
+
+    client = app.test_client()
+    print(f"\nPOST /predict-price, {args.requests} requests")
+    print(f"  {'interval':<24} {'p50 ms':>8} {'p99 ms':>8}")
+    for method in INTERVAL_METHODS:
+        body = {'millet_type': MILLET_TYPE, 'days_ahead': 7, 'interval': method}
+        p50, p99 = timed(lambda: client.post('/predict-price', json=body), args.requests)
+        print(f"  {method:<24} {p50:>8.2f} {p99:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import numpy as np
+
+
+class FlatForest:
+    """A fitted random forest flattened into contiguous node arrays.
+
+    All trees share one set of arrays, so an artifact is a handful of plain
+    numpy arrays that joblib can memory-map, and prediction walks every tree
+    for every row at once, one tree level per numpy step, without going
+    through scikit-learn's input validation. Kept in its own module so
+    pickled artifacts load whether app.py runs as a script or is imported.
+    """
+    
+    def __init__(self, forest):
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        self.roots = offsets[:-1].astype(np.intp)
+        self.depth = max(tree.max_depth for tree in trees)
+        self.n_features_in_ = forest.n_features_in_
+        
+        features, thresholds, lefts, rights, values = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+            # Leaves point at themselves, so rows that reach one early stay put
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+            values.append(tree.value[:, 0, 0])
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts).astype(np.intp)
+        self.right = np.concatenate(rights).astype(np.intp)
+        self.value = np.concatenate(values)
+    
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+    
+    def predict_trees(self, X):
+        """Prediction of every tree for every row, shaped (rows, trees)"""
+        # scikit-learn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes]
+    
+    def predict(self, X):
+        return self.predict_trees(X).mean(axis=1)
+    
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.roots, self.feature, self.threshold,
+                                              self.left, self.right, self.value))
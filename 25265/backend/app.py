@@ -1,8 +1,10 @@
-from flask import Flask, request, jsonify, session
+from flask import Flask, request, jsonify, session, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+import click
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 import jwt
 import os
 from werkzeug.utils import secure_filename
@@ -10,19 +12,272 @@ import uuid
 import requests
 import hashlib
 import razorpay
+import base64
+import csv
+import json
+import math
+import threading
+import time
+import random
+import gzip
+import zlib
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip is offered without it
+    brotli = None
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///millets_platform.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///millets_platform.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 60))  # seconds
+app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', 10000))
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+app.config['PASSWORD_WORKERS'] = int(os.environ.get('PASSWORD_WORKERS', 4))
+app.config['PASSWORD_QUEUE_DEPTH'] = int(os.environ.get('PASSWORD_QUEUE_DEPTH', 32))
+
+# Database engine settings. SQLite pragmas are applied to every new
+# connection; set one to an empty string to keep SQLite's own default.
+app.config['SQLITE_PRAGMAS'] = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'busy_timeout': os.environ.get('SQLITE_BUSY_TIMEOUT', '5000'),  # milliseconds
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)),  # bytes
+}
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true',
+    'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),  # seconds
+}
+for option, variable in (('pool_size', 'DB_POOL_SIZE'), ('max_overflow', 'DB_MAX_OVERFLOW'),
+                         ('pool_timeout', 'DB_POOL_TIMEOUT')):
+    if os.environ.get(variable):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'][option] = int(os.environ[variable])
+
+# Response serialization and compression
+app.config['JSON_SERIALIZER'] = os.environ.get('JSON_SERIALIZER', 'orjson' if orjson else 'json')  # orjson, json
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # bytes
+app.config['COMPRESS_LEVEL'] = int(os.environ.get('COMPRESS_LEVEL', 6))  # gzip 1-9
+app.config['COMPRESS_BR_QUALITY'] = int(os.environ.get('COMPRESS_BR_QUALITY', 5))  # brotli 0-11
+app.config['COMPRESS_MIMETYPES'] = {'application/json'}
+
+# AI price service client: pooled keep-alive connections, a circuit breaker
+# that stops calling a failing service for AI_BREAKER_RESET seconds after
+# AI_BREAKER_FAILURES consecutive failures, and a TTL cache of responses
+app.config['AI_SERVICE_URL'] = os.environ.get('AI_SERVICE_URL', 'http://localhost:5001')
+app.config['AI_CONNECT_TIMEOUT'] = float(os.environ.get('AI_CONNECT_TIMEOUT', 2))  # seconds
+app.config['AI_READ_TIMEOUT'] = float(os.environ.get('AI_READ_TIMEOUT', 10))  # seconds
+app.config['AI_POOL_SIZE'] = int(os.environ.get('AI_POOL_SIZE', 20))
+app.config['AI_BREAKER_FAILURES'] = int(os.environ.get('AI_BREAKER_FAILURES', 5))
+app.config['AI_BREAKER_RESET'] = float(os.environ.get('AI_BREAKER_RESET', 30))  # seconds
+app.config['AI_CACHE_TTL'] = int(os.environ.get('AI_CACHE_TTL', 300))  # seconds
+app.config['AI_CACHE_SIZE'] = int(os.environ.get('AI_CACHE_SIZE', 5000))
+
+# Traceability anchoring: pending records are hashed into a Merkle tree and
+# only its root is anchored, once per window, through the blockchain service
+# behind ANCHOR_SERVICE_URL (blockchain/src/anchorServer.js) or, when that is
+# unset, on a local hash-chained ledger table
+app.config['ANCHOR_SERVICE_URL'] = os.environ.get('ANCHOR_SERVICE_URL', '')
+app.config['ANCHOR_SERVICE_TOKEN'] = os.environ.get('ANCHOR_SERVICE_TOKEN', '')  # the anchor server's ANCHOR_TOKEN
+app.config['ANCHOR_TIMEOUT'] = float(os.environ.get('ANCHOR_TIMEOUT', 30))  # seconds
+app.config['ANCHOR_WINDOW_SECONDS'] = int(os.environ.get('ANCHOR_WINDOW_SECONDS', 300))  # 0 disables the anchorer thread
+app.config['ANCHOR_MAX_LEAVES'] = int(os.environ.get('ANCHOR_MAX_LEAVES', 10000))  # records per Merkle root
 
 # Initialize Razorpay
 client = razorpay.Client(auth=("rzp_test_1234567890", "test_key_1234567890"))  # Replace with actual keys
 
 db = SQLAlchemy(app)
 bcrypt = Bcrypt(app)
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor'])
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider writing dates and datetimes as ISO 8601 strings, so views
+    can return model values directly. Uses orjson when JSON_SERIALIZER is
+    'orjson', otherwise the standard library."""
+    
+    @staticmethod
+    def default(o):
+        if isinstance(o, (date, datetime)):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+    
+    @property
+    def use_orjson(self):
+        return orjson is not None and self._app.config['JSON_SERIALIZER'] == 'orjson'
+    
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+        kwargs.setdefault('default', self.default)
+        return json.dumps(obj, **kwargs)
+    
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.use_orjson:
+            body = orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            body = json.dumps(obj, default=self.default, separators=(',', ':'))
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+app.json = FastJSONProvider(app)
+
+def negotiate_encoding():
+    """Best content coding the client accepts: br (when available) or gzip"""
+    offered = ['br', 'gzip'] if brotli else ['gzip']
+    # Highest client quality wins; ties go to the earlier (smaller) coding
+    encoding = max(offered, key=lambda name: (request.accept_encodings[name], -offered.index(name)))
+    return encoding if request.accept_encodings[encoding] > 0 else None
+
+def compress_stream(chunks, encoding):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=app.config['COMPRESS_BR_QUALITY'])
+        compress, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(app.config['COMPRESS_LEVEL'], zlib.DEFLATED, 31)  # 31: gzip container
+        compress, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        data = compress(chunk.encode() if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield finish()
+
+@app.after_request
+def compress_response(response):
+    if (response.mimetype not in app.config['COMPRESS_MIMETYPES'] or response.status_code != 200
+            or response.direct_passthrough or 'Content-Encoding' in response.headers):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    if not encoding:
+        return response
+    
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < app.config['COMPRESS_MIN_SIZE']:
+            return response
+        if encoding == 'br':
+            response.set_data(brotli.compress(data, quality=app.config['COMPRESS_BR_QUALITY']))
+        else:
+            response.set_data(gzip.compress(data, compresslevel=app.config['COMPRESS_LEVEL']))
+    
+    response.headers['Content-Encoding'] = encoding
+    # Each encoding is a distinct representation and needs its own strong tag
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in app.config['SQLITE_PRAGMAS'].items():
+        if value:
+            cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+with app.app_context():
+    if db.engine.dialect.name == 'sqlite':
+        db.event.listen(db.engine, 'connect', apply_sqlite_pragmas)
+
+class PasswordPoolBusy(Exception):
+    """Raised when the password pool already has its maximum of queued jobs"""
+
+class PasswordPool:
+    """Runs bcrypt on a small dedicated thread pool so a burst of logins
+    cannot occupy every request thread. Jobs beyond workers + queue_depth
+    are rejected immediately instead of queueing without bound."""
+    
+    def __init__(self, workers, queue_depth):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._lock = threading.Lock()
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.completed = 0
+        self.rejected = 0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+    
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordPoolBusy()
+        submitted = time.perf_counter()
+        
+        def job():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                self._slots.release()
+                with self._lock:
+                    self.completed += 1
+                    self.wait_seconds_total += started - submitted
+                    self.wait_seconds_max = max(self.wait_seconds_max, started - submitted)
+                    self.hash_seconds_total += finished - started
+                    self.hash_seconds_max = max(self.hash_seconds_max, finished - started)
+        
+        try:
+            return self._executor.submit(job).result()
+        except RuntimeError:
+            self._slots.release()
+            raise
+    
+    def hash(self, password):
+        return self._run(bcrypt.generate_password_hash, password).decode('utf-8')
+    
+    def verify(self, password_hash, password):
+        return self._run(bcrypt.check_password_hash, password_hash, password)
+    
+    def stats(self):
+        with self._lock:
+            completed = self.completed
+            return {
+                'workers': self.workers,
+                'queue_depth': self.queue_depth,
+                'completed': completed,
+                'rejected': self.rejected,
+                'hash_ms_avg': round(self.hash_seconds_total / completed * 1000, 2) if completed else 0,
+                'hash_ms_max': round(self.hash_seconds_max * 1000, 2),
+                'queue_wait_ms_avg': round(self.wait_seconds_total / completed * 1000, 2) if completed else 0,
+                'queue_wait_ms_max': round(self.wait_seconds_max * 1000, 2)
+            }
+
+password_pool = PasswordPool(app.config['PASSWORD_WORKERS'], app.config['PASSWORD_QUEUE_DEPTH'])
+
+def password_needs_rehash(password_hash):
+    """True when a bcrypt hash ($2b$<cost>$...) uses fewer rounds than configured"""
+    try:
+        return int(password_hash.split('$')[2]) < app.config['BCRYPT_LOG_ROUNDS']
+    except (IndexError, ValueError):
+        return False
+
+def password_pool_busy_response():
+    response = jsonify({'message': 'Server is busy, please retry shortly!'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -50,11 +305,15 @@ class User(db.Model):
     business_type = db.Column(db.String(50), nullable=True)
     license_number = db.Column(db.String(100), nullable=True)
     
+    __table_args__ = (
+        db.Index('ix_user_state_district', 'state', 'district'),
+    )
+    
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = password_pool.hash(password)
     
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_pool.verify(self.password_hash, password)
 
 class MilletProduct(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -76,6 +335,14 @@ class MilletProduct(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     farmer = db.relationship('User', backref=db.backref('products', lazy=True))
+    
+    # Catalog sorts and filters always include status='available'
+    __table_args__ = (
+        db.Index('ix_millet_product_status_created', 'status', 'created_at'),
+        db.Index('ix_millet_product_status_type_created', 'status', 'type', 'created_at'),
+        db.Index('ix_millet_product_status_price', 'status', 'price_per_unit'),
+        db.Index('ix_millet_product_farmer_status', 'farmer_id', 'status'),
+    )
 
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -95,6 +362,15 @@ class Order(db.Model):
     buyer = db.relationship('User', foreign_keys=[buyer_id], backref=db.backref('orders_as_buyer', lazy=True))
     seller = db.relationship('User', foreign_keys=[seller_id], backref=db.backref('orders_as_seller', lazy=True))
     product = db.relationship('MilletProduct', backref=db.backref('orders', lazy=True))
+    
+    # Order history is read per seller, per buyer or platform-wide, newest first
+    __table_args__ = (
+        db.Index('ix_order_seller_date', 'seller_id', 'order_date'),
+        db.Index('ix_order_buyer_date', 'buyer_id', 'order_date'),
+        db.Index('ix_order_status_date', 'status', 'order_date'),
+        db.Index('ix_order_date', 'order_date'),
+        db.Index('ix_order_product', 'product_id'),
+    )
 
 class TraceabilityRecord(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -107,8 +383,21 @@ class TraceabilityRecord(db.Model):
     certificate_url = db.Column(db.String(200), nullable=True)
     blockchain_hash = db.Column(db.String(100), nullable=True)
     is_verified = db.Column(db.Boolean, default=False)
+    idempotency_key = db.Column(db.String(100), nullable=True)  # client-chosen, makes bulk retries safe
+    # Set when the record's window is anchored; NULL anchor_id means pending
+    anchor_id = db.Column(db.Integer, db.ForeignKey('trace_anchor.id'), nullable=True)
+    leaf_hash = db.Column(db.String(64), nullable=True)
+    merkle_index = db.Column(db.Integer, nullable=True)
+    merkle_proof = db.Column(db.Text, nullable=True)  # JSON sibling path from the leaf to the anchored root
     
     product = db.relationship('MilletProduct', backref=db.backref('traceability_records', lazy=True))
+    anchor = db.relationship('TraceAnchor')
+    
+    __table_args__ = (
+        db.Index('ix_traceability_record_product_timestamp', 'product_id', 'timestamp'),
+        db.Index('uq_traceability_record_idempotency_key', 'idempotency_key', unique=True),
+        db.Index('ix_traceability_record_anchor', 'anchor_id', 'id'),
+    )
 
 class BlockchainBatch(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -120,6 +409,27 @@ class BlockchainBatch(db.Model):
     
     product = db.relationship('MilletProduct', backref=db.backref('blockchain_batches', lazy=True))
 
+class TraceAnchor(db.Model):
+    """Merkle root committing one window of traceability records to a chain"""
+    id = db.Column(db.Integer, primary_key=True)
+    merkle_root = db.Column(db.String(64), unique=True, nullable=False)
+    leaf_count = db.Column(db.Integer, nullable=False)
+    first_record_id = db.Column(db.Integer, nullable=False)
+    last_record_id = db.Column(db.Integer, nullable=False)
+    network = db.Column(db.String(20), nullable=False)  # local, ethereum
+    transaction_hash = db.Column(db.String(100), nullable=True)
+    block_number = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class LedgerBlock(db.Model):
+    """Block of the local stand-in chain; each block's hash covers its predecessor's"""
+    number = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    kind = db.Column(db.String(20), nullable=False)  # merkle_root, batch
+    payload_hash = db.Column(db.String(64), nullable=False)
+    previous_hash = db.Column(db.String(64), nullable=False)
+    block_hash = db.Column(db.String(64), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+
 class Payment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
@@ -130,6 +440,10 @@ class Payment(db.Model):
     payment_date = db.Column(db.DateTime, default=datetime.utcnow)
     
     order = db.relationship('Order', backref=db.backref('payments', lazy=True))
+    
+    __table_args__ = (
+        db.Index('ix_payment_order', 'order_id'),
+    )
 
 class GovernmentScheme(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -150,6 +464,415 @@ class MarketPrice(db.Model):
     price_per_kg = db.Column(db.Float, nullable=False)
     date = db.Column(db.Date, nullable=False)
     source = db.Column(db.String(100), nullable=False)  # mandi, government, platform
+    
+    __table_args__ = (
+        db.Index('ix_market_price_state_district_date', 'state', 'district', 'date'),
+        db.Index('ix_market_price_date', 'date'),
+        db.Index('uq_market_price_observation', 'millet_type', 'state', 'district', 'date', 'source', unique=True),
+    )
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ttl seconds"""
+    
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+    
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0
+            }
+
+class Counters:
+    """Named thread-safe counters for the metrics endpoint"""
+    
+    def __init__(self, *names):
+        self._values = dict.fromkeys(names, 0)
+        self._lock = threading.Lock()
+    
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._values[name] += amount
+    
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+class CachedUser:
+    """Read-only snapshot of a User row, safe to share across requests and sessions"""
+    
+    def __init__(self, user):
+        for column in User.__table__.columns:
+            setattr(self, column.key, getattr(user, column.key))
+
+user_cache = TTLCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+
+# Flush events fire before commit, when other requests can still read (and
+# cache) the old row, so changed users are only evicted once the commit lands
+@db.event.listens_for(User, 'after_update')
+@db.event.listens_for(User, 'after_delete')
+def collect_changed_user(mapper, connection, target):
+    db.inspect(target).session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+@db.event.listens_for(Session, 'after_commit')
+def invalidate_cached_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        user_cache.invalidate(user_id)
+
+@db.event.listens_for(Session, 'after_rollback')
+def discard_changed_users(session):
+    session.info.pop('changed_user_ids', None)
+
+def load_current_user(user_id):
+    current_user = user_cache.get(user_id)
+    if current_user is None:
+        user = db.session.get(User, user_id)
+        if user is not None:
+            current_user = CachedUser(user)
+            user_cache.set(user_id, current_user)
+    return current_user
+
+class DashboardStats(db.Model):
+    """Running dashboard counters, one row per user plus a platform-wide row
+    (user_id = GLOBAL_STATS_ID). Maintained in the same transaction as the
+    writes they count; `flask rebuild-stats` recomputes them from scratch."""
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    total_users = db.Column(db.Integer, nullable=False, default=0)
+    total_products = db.Column(db.Integer, nullable=False, default=0)
+    active_listings = db.Column(db.Integer, nullable=False, default=0)
+    total_orders = db.Column(db.Integer, nullable=False, default=0)
+    orders_as_seller = db.Column(db.Integer, nullable=False, default=0)
+    orders_as_buyer = db.Column(db.Integer, nullable=False, default=0)
+    pending_orders = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    spent = db.Column(db.Float, nullable=False, default=0)
+
+GLOBAL_STATS_ID = 0
+
+def upsert_insert():
+    """The dialect's INSERT construct with ON CONFLICT support, or None"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert
+
+def bump_stats(user_id, **deltas):
+    """Add deltas to a stats row within the current transaction.
+    
+    A single upsert, so two requests creating the same row concurrently
+    cannot both insert it."""
+    table = DashboardStats.__table__
+    increments = {name: table.c[name] + delta for name, delta in deltas.items()}
+    insert = upsert_insert()
+    if insert is not None:
+        statement = insert(table).values(user_id=user_id, **deltas)
+        db.session.execute(statement.on_conflict_do_update(index_elements=['user_id'], set_=increments))
+        return
+    
+    update = table.update().where(table.c.user_id == user_id).values(increments)
+    if db.session.execute(update).rowcount == 0:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(table.insert().values(user_id=user_id, **deltas))
+        except IntegrityError:
+            # Another transaction inserted the row first
+            db.session.execute(update)
+
+def rebuild_dashboard_stats():
+    """Recompute every stats row from the source tables"""
+    rows = defaultdict(dict)
+    
+    for farmer_id, total, active in db.session.query(
+        MilletProduct.farmer_id,
+        db.func.count(MilletProduct.id),
+        db.func.sum(db.case((MilletProduct.status == 'available', 1), else_=0))
+    ).group_by(MilletProduct.farmer_id):
+        rows[farmer_id].update(total_products=total, active_listings=active or 0)
+    
+    paid_amount = db.case((Order.payment_status == 'paid', Order.total_amount), else_=0)
+    for seller_id, total, revenue in db.session.query(
+        Order.seller_id, db.func.count(Order.id), db.func.sum(paid_amount)
+    ).group_by(Order.seller_id):
+        rows[seller_id].update(orders_as_seller=total, revenue=revenue or 0)
+    
+    for buyer_id, total, pending, spent in db.session.query(
+        Order.buyer_id,
+        db.func.count(Order.id),
+        db.func.sum(db.case((Order.status == 'pending', 1), else_=0)),
+        db.func.sum(paid_amount)
+    ).group_by(Order.buyer_id):
+        rows[buyer_id].update(orders_as_buyer=total, pending_orders=pending or 0, spent=spent or 0)
+    
+    rows[GLOBAL_STATS_ID] = {
+        'total_users': User.query.count(),
+        'total_products': MilletProduct.query.count(),
+        'active_listings': MilletProduct.query.filter_by(status='available').count(),
+        'total_orders': Order.query.count(),
+        'revenue': db.session.query(db.func.sum(Order.total_amount)).filter_by(payment_status='paid').scalar() or 0
+    }
+    
+    DashboardStats.query.delete()
+    db.session.add_all(DashboardStats(user_id=user_id, **values) for user_id, values in rows.items())
+    db.session.commit()
+    return len(rows)
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute dashboard counters from products, orders and users"""
+    count = rebuild_dashboard_stats()
+    print(f"Rebuilt {count} dashboard stats rows")
+
+class ResourceVersion(db.Model):
+    """Change counter per cached resource collection (e.g. 'products',
+    'traceability:42'), bumped in the same transaction as the write. Read
+    endpoints derive their ETag and Last-Modified from it."""
+    name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+def bump_version(name):
+    now = datetime.utcnow()
+    table = ResourceVersion.__table__
+    insert = upsert_insert()
+    if insert is not None:
+        statement = insert(table).values(name=name, version=1, updated_at=now)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['name'], set_={'version': table.c.version + 1, 'updated_at': now}))
+        return
+    
+    update = table.update().where(table.c.name == name).values(version=table.c.version + 1, updated_at=now)
+    if db.session.execute(update).rowcount == 0:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(table.insert().values(name=name, version=1, updated_at=now))
+        except IntegrityError:
+            db.session.execute(update)
+
+class MarketPriceRollup(db.Model):
+    """Daily, weekly and monthly price aggregates per millet type and district.
+    Sum and count are stored instead of the average so rollups of several
+    districts can be combined into state or national series."""
+    id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.String(10), nullable=False)  # day, week, month
+    bucket_start = db.Column(db.Date, nullable=False)
+    millet_type = db.Column(db.String(50), nullable=False)
+    state = db.Column(db.String(50), nullable=False)
+    district = db.Column(db.String(50), nullable=False)
+    sample_count = db.Column(db.Integer, nullable=False)
+    price_sum = db.Column(db.Float, nullable=False)
+    price_min = db.Column(db.Float, nullable=False)
+    price_max = db.Column(db.Float, nullable=False)
+    
+    __table_args__ = (
+        db.Index('uq_market_price_rollup', 'bucket', 'millet_type', 'state', 'district', 'bucket_start', unique=True),
+        db.Index('ix_market_price_rollup_region', 'bucket', 'state', 'district', 'bucket_start'),
+    )
+
+# Schema migrations
+#
+# Each migration is (version, description, fn(connection)) and runs once, in
+# order, inside its own transaction. Applied versions are recorded in the
+# schema_version table so an existing database can be upgraded in place with
+# `flask db-upgrade`. Append new migrations; never edit applied ones.
+class SchemaVersion(db.Model):
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    description = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+def create_indexes(*names):
+    """Migration step creating the named model indexes if they do not exist yet"""
+    def migrate(connection):
+        indexes = {index.name: index for table in db.metadata.sorted_tables for index in table.indexes}
+        for name in names:
+            indexes[name].create(connection, checkfirst=True)
+    return migrate
+
+def add_columns(table_name, *names):
+    """Migration step adding the named model columns to an existing table if they are missing"""
+    def migrate(connection):
+        table = db.metadata.tables[table_name]
+        existing = {column['name'] for column in db.inspect(connection).get_columns(table_name)}
+        quote = connection.dialect.identifier_preparer.quote
+        for name in names:
+            if name not in existing:
+                column_type = table.columns[name].type.compile(dialect=connection.dialect)
+                connection.execute(db.text(f"ALTER TABLE {quote(table_name)} ADD COLUMN {quote(name)} {column_type}"))
+    return migrate
+
+def add_traceability_idempotency_keys(connection):
+    add_columns('traceability_record', 'idempotency_key')(connection)
+    create_indexes('uq_traceability_record_idempotency_key')(connection)
+
+def add_traceability_anchoring(connection):
+    TraceAnchor.__table__.create(connection, checkfirst=True)
+    LedgerBlock.__table__.create(connection, checkfirst=True)
+    add_columns('traceability_record', 'anchor_id', 'leaf_hash', 'merkle_index', 'merkle_proof')(connection)
+    create_indexes('ix_traceability_record_anchor')(connection)
+
+def create_price_rollups(connection):
+    MarketPriceRollup.__table__.create(connection, checkfirst=True)
+    # Backfill from the prices already stored so upgraded databases serve series at once
+    rebuild_price_rollups(connection)
+
+def dedupe_market_prices(connection):
+    # Keep the latest row of each observation so the unique index can be built
+    connection.execute(db.text(
+        "DELETE FROM market_price WHERE id NOT IN ("
+        "SELECT MAX(id) FROM market_price GROUP BY millet_type, state, district, date, source)"
+    ))
+    create_indexes('uq_market_price_observation')(connection)
+
+MIGRATIONS = [
+    (1, 'Initial schema', lambda connection: db.metadata.create_all(connection)),
+    (2, 'Secondary indexes for catalog, order, traceability and market price queries', create_indexes(
+        'ix_user_state_district',
+        'ix_millet_product_status_created', 'ix_millet_product_status_type_created',
+        'ix_millet_product_status_price', 'ix_millet_product_farmer_status',
+        'ix_order_seller_date', 'ix_order_buyer_date', 'ix_order_status_date', 'ix_order_date', 'ix_order_product',
+        'ix_traceability_record_product_timestamp', 'ix_payment_order',
+        'ix_market_price_state_district_date', 'ix_market_price_date'
+    )),
+    (3, 'Unique market price observations for bulk upserts', dedupe_market_prices),
+    (4, 'Market price rollups', create_price_rollups),
+    (5, 'Resource versions for conditional GET', lambda connection: ResourceVersion.__table__.create(connection, checkfirst=True)),
+    (6, 'Idempotency keys for bulk traceability ingestion', add_traceability_idempotency_keys),
+    (7, 'Merkle anchoring of traceability records', add_traceability_anchoring),
+]
+
+def upgrade_database():
+    """Apply pending migrations and return the versions that were applied"""
+    SchemaVersion.__table__.create(db.engine, checkfirst=True)
+    applied = {version for (version,) in db.session.query(SchemaVersion.version)}
+    db.session.commit()
+    
+    newly_applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        with db.engine.begin() as connection:
+            migrate(connection)
+            connection.execute(SchemaVersion.__table__.insert().values(
+                version=version, description=description, applied_at=datetime.utcnow()
+            ))
+        newly_applied.append(version)
+    return newly_applied
+
+@app.cli.command('db-upgrade')
+def db_upgrade_command():
+    """Bring the database schema up to the latest migration"""
+    applied = upgrade_database()
+    if applied:
+        print(f"Applied migrations: {', '.join(str(version) for version in applied)}")
+    else:
+        print("Database schema is up to date")
+
+# Routes the index check exercises, with the user type they run as
+INDEX_CHECK_ROUTES = [
+    ('/api/products', None),
+    ('/api/products?type=Pearl Millet', None),
+    ('/api/products?sort=price_low', None),
+    ('/api/products?state=Bihar&district=Muzaffarpur', None),
+    ('/api/products/1', None),
+    ('/api/products?ids=1,2,3', None),
+    ('/api/orders', 'farmer'),
+    ('/api/orders', 'buyer'),
+    ('/api/orders', 'admin'),
+    ('/api/orders?status=pending', 'admin'),
+    ('/api/traceability/1', None),
+    ('/api/market-prices', None),
+    ('/api/market-prices?state=Bihar&district=Muzaffarpur', None),
+    ('/api/dashboard/stats', 'farmer'),
+]
+INDEX_CHECK_TABLES = ('millet_product', 'order', 'traceability_record', 'market_price', 'payment')
+
+@app.cli.command('check-indexes')
+def check_indexes_command():
+    """EXPLAIN every query issued by the hot routes and flag full table scans"""
+    if db.engine.dialect.name != 'sqlite':
+        print("check-indexes uses EXPLAIN QUERY PLAN and only supports SQLite")
+        return
+    
+    tokens = {}
+    for user_type in {user_type for _, user_type in INDEX_CHECK_ROUTES if user_type}:
+        user = User.query.filter_by(user_type=user_type).first()
+        if user:
+            tokens[user_type] = jwt.encode({'user_id': user.id, 'exp': datetime.utcnow() + timedelta(minutes=5)},
+                                           app.config['SECRET_KEY'], algorithm='HS256')
+    
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+    
+    client = app.test_client()
+    failures = 0
+    db.event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        for url, user_type in INDEX_CHECK_ROUTES:
+            if user_type and user_type not in tokens:
+                print(f"SKIP {url} (no {user_type} user)")
+                continue
+            statements.clear()
+            headers = {'Authorization': tokens[user_type]} if user_type else {}
+            client.get(url, headers=headers)
+            for statement, parameters in list(statements):
+                with db.engine.connect() as connection:
+                    plan = [row[-1] for row in connection.exec_driver_sql(
+                        f"EXPLAIN QUERY PLAN {statement}", parameters
+                    )]
+                scans = [step for step in plan if step.startswith('SCAN') and 'USING' not in step
+                         and step.split()[1].strip('"') in INDEX_CHECK_TABLES]
+                failures += bool(scans)
+                print(f"{'SCAN' if scans else 'OK  '} {url} [{user_type or 'anonymous'}]")
+                for step in plan:
+                    print(f"       {step}")
+    finally:
+        db.event.remove(db.engine, 'before_cursor_execute', capture)
+    
+    if failures:
+        raise SystemExit(f"{failures} queries scan a table without an index")
 
 # Authentication decorator
 def token_required(f):
@@ -162,13 +885,61 @@ def token_required(f):
         
         try:
             data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-            current_user = User.query.filter_by(id=data['user_id']).first()
+            current_user = load_current_user(data['user_id'])
         except:
             return jsonify({'message': 'Token is invalid!'}), 401
         
         return f(current_user, *args, **kwargs)
     return decorated
 
+def conditional(resource, max_age=0):
+    """Serve 304 Not Modified when the client already has the current version.
+    
+    resource is a collection name or a function of the view arguments that
+    returns one. The version is looked up before the view runs, so a
+    matching If-None-Match skips the query and serialization entirely.
+    """
+    from functools import wraps
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            name = resource(**kwargs) if callable(resource) else resource
+            current = db.session.get(ResourceVersion, name)
+            # The timestamp keeps tags unique if the database is ever recreated
+            etag = f"{name}-{current.version}-{int(current.updated_at.timestamp() * 1000)}" if current else f"{name}-0"
+            last_modified = None
+            if current:
+                # HTTP dates have whole seconds: round up, and only advertise a
+                # second that has fully elapsed so no later write can share it
+                last_modified = current.updated_at.replace(microsecond=0)
+                if current.updated_at.microsecond:
+                    last_modified += timedelta(seconds=1)
+                if last_modified > datetime.utcnow():
+                    last_modified = None
+            
+            if request.if_none_match:
+                variants = [etag] + [f"{etag}-{encoding}" for encoding in ('gzip', 'br')]
+                matched = next((tag for tag in variants if request.if_none_match.contains(tag)), None)
+                not_modified = matched is not None
+                etag = matched or etag
+            else:
+                not_modified = bool(last_modified and request.if_modified_since
+                                    and last_modified <= request.if_modified_since.replace(tzinfo=None))
+            if not_modified:
+                response = app.response_class(status=304)
+            else:
+                response = app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = f'public, max-age={max_age}' if max_age else 'no-cache'
+            return response
+        return decorated
+    return decorator
+
 # Routes
 @app.route('/api/register', methods=['POST'])
 def register():
@@ -192,9 +963,13 @@ def register():
         business_type=data.get('business_type'),
         license_number=data.get('license_number')
     )
-    user.set_password(data['password'])
+    try:
+        user.set_password(data['password'])
+    except PasswordPoolBusy:
+        return password_pool_busy_response()
     
     db.session.add(user)
+    bump_stats(GLOBAL_STATS_ID, total_users=1)
     db.session.commit()
     
     return jsonify({'message': 'User registered successfully!'}), 201
@@ -204,7 +979,21 @@ def login():
     data = request.get_json()
     user = User.query.filter_by(email=data['email']).first()
     
-    if user and user.check_password(data['password']):
+    try:
+        authenticated = user is not None and user.check_password(data['password'])
+    except PasswordPoolBusy:
+        return password_pool_busy_response()
+    
+    # Re-hash with the current cost while the plaintext is at hand; best
+    # effort, a busy pool just leaves it for the next login
+    if authenticated and password_needs_rehash(user.password_hash):
+        try:
+            user.set_password(data['password'])
+            db.session.commit()
+        except PasswordPoolBusy:
+            pass
+    
+    if authenticated:
         token = jwt.encode({
             'user_id': user.id,
             'exp': datetime.utcnow() + timedelta(hours=24)
@@ -244,29 +1033,143 @@ def get_profile(current_user):
         'is_verified': current_user.is_verified
     })
 
+# Sort orders for the product catalog: column and whether it is descending.
+# Every sort is keyset-paginated on (column, id) so deep pages stay cheap.
+PRODUCT_SORTS = {
+    'newest': (MilletProduct.created_at, True),
+    'price_low': (MilletProduct.price_per_unit, False),
+    'price_high': (MilletProduct.price_per_unit, True),
+    'quantity': (MilletProduct.quantity, True)
+}
+PRODUCTS_DEFAULT_LIMIT = 50
+PRODUCTS_MAX_LIMIT = 200
+
+def encode_cursor(value, row_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    return value, int(row_id)
+
+def keyset_filter(query, column, id_column, descending, cursor):
+    """Restrict query to rows strictly after cursor in (column, id) order"""
+    value, row_id = cursor
+    if descending:
+        return query.filter(db.or_(column < value, db.and_(column == value, id_column < row_id)))
+    return query.filter(db.or_(column > value, db.and_(column == value, id_column > row_id)))
+
+def parse_limit(default, maximum):
+    limit = request.args.get('limit', default, type=int)
+    return max(1, min(limit, maximum))
+
+def serialize_product(product):
+    return {
+        'id': product.id,
+        'name': product.name,
+        'type': product.type,
+        'variety': product.variety,
+        'farmer_name': product.farmer.full_name,
+        'quantity': product.quantity,
+        'unit': product.unit,
+        'price_per_unit': product.price_per_unit,
+        'harvest_date': product.harvest_date,
+        'quality_grade': product.quality_grade,
+        'organic_certified': product.organic_certified,
+        'description': product.description,
+        'created_at': product.created_at
+    }
+
+def load_products_by_id(product_ids):
+    """Fetch products by primary key with their farmers in one query"""
+    return MilletProduct.query.join(MilletProduct.farmer).options(
+        db.contains_eager(MilletProduct.farmer)
+    ).filter(MilletProduct.id.in_(product_ids)).all()
+
 @app.route('/api/products', methods=['GET'])
+@conditional('products')
 def get_products():
-    products = MilletProduct.query.filter_by(status='available').all()
-    result = []
+    args = request.args
     
-    for product in products:
-        result.append({
-            'id': product.id,
-            'name': product.name,
-            'type': product.type,
-            'variety': product.variety,
-            'farmer_name': product.farmer.full_name,
-            'quantity': product.quantity,
-            'unit': product.unit,
-            'price_per_unit': product.price_per_unit,
-            'harvest_date': product.harvest_date.isoformat(),
-            'quality_grade': product.quality_grade,
-            'organic_certified': product.organic_certified,
-            'description': product.description,
-            'created_at': product.created_at.isoformat()
-        })
+    # Multi-get: ?ids=1,2,3 returns exactly those products in the requested order
+    if args.get('ids'):
+        try:
+            product_ids = list(dict.fromkeys(int(i) for i in args['ids'].split(',') if i.strip()))
+        except ValueError:
+            return jsonify({'message': 'ids must be a comma-separated list of integers!'}), 400
+        if len(product_ids) > PRODUCTS_MAX_LIMIT:
+            return jsonify({'message': f'At most {PRODUCTS_MAX_LIMIT} ids per request!'}), 400
+        products = {product.id: product for product in load_products_by_id(product_ids)}
+        return jsonify([serialize_product(products[i]) for i in product_ids if i in products])
     
-    return jsonify(result)
+    sort_column, descending = PRODUCT_SORTS.get(args.get('sort', 'newest'), PRODUCT_SORTS['newest'])
+    limit = parse_limit(PRODUCTS_DEFAULT_LIMIT, PRODUCTS_MAX_LIMIT)
+    try:
+        min_price = float(args['min_price']) if args.get('min_price') else None
+        max_price = float(args['max_price']) if args.get('max_price') else None
+        if not all(math.isfinite(price) for price in (min_price, max_price) if price is not None):
+            raise ValueError
+    except ValueError:
+        return jsonify({'message': 'min_price and max_price must be numbers!'}), 400
+    
+    # Join the farmer once so farmer_name and the state/district filters
+    # come from the same query instead of one lazy load per product
+    query = MilletProduct.query.join(MilletProduct.farmer).options(
+        db.contains_eager(MilletProduct.farmer)
+    ).filter(MilletProduct.status == 'available')
+    
+    if args.get('type'):
+        query = query.filter(MilletProduct.type == args['type'])
+    if args.get('quality_grade'):
+        query = query.filter(MilletProduct.quality_grade == args['quality_grade'])
+    organic = args.get('organic_certified', args.get('organic'))
+    if organic is not None:
+        query = query.filter(MilletProduct.organic_certified == (organic.lower() in ('true', '1', 'yes')))
+    if min_price is not None:
+        query = query.filter(MilletProduct.price_per_unit >= min_price)
+    if max_price is not None:
+        query = query.filter(MilletProduct.price_per_unit <= max_price)
+    if args.get('state'):
+        query = query.filter(User.state == args['state'])
+    if args.get('district'):
+        query = query.filter(User.district == args['district'])
+    
+    if args.get('cursor'):
+        try:
+            value, row_id = decode_cursor(args['cursor'])
+            if sort_column is MilletProduct.created_at:
+                value = datetime.fromisoformat(value)
+        except (ValueError, TypeError):
+            return jsonify({'message': 'Invalid cursor!'}), 400
+        query = keyset_filter(query, sort_column, MilletProduct.id, descending, (value, row_id))
+    
+    if descending:
+        query = query.order_by(sort_column.desc(), MilletProduct.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), MilletProduct.id.asc())
+    
+    # Fetch one extra row to learn whether another page exists
+    products = query.limit(limit + 1).all()
+    has_more = len(products) > limit
+    products = products[:limit]
+    
+    response = jsonify([serialize_product(product) for product in products])
+    if has_more:
+        last = products[-1]
+        response.headers['X-Next-Cursor'] = encode_cursor(getattr(last, sort_column.key), last.id)
+    return response
+
+@app.route('/api/products/<int:product_id>', methods=['GET'])
+@conditional('products')
+def get_product(product_id):
+    products = load_products_by_id([product_id])
+    if not products:
+        return jsonify({'message': 'Product not found!'}), 404
+    
+    return jsonify(serialize_product(products[0]))
 
 @app.route('/api/products', methods=['POST'])
 @token_required
@@ -293,73 +1196,269 @@ def add_product(current_user):
     )
     
     db.session.add(product)
+    bump_stats(current_user.id, total_products=1, active_listings=1)
+    bump_stats(GLOBAL_STATS_ID, total_products=1, active_listings=1)
+    bump_version('products')
     db.session.commit()
     
     return jsonify({'message': 'Product added successfully!'}), 201
 
+def generate_order_number(date_prefix=None):
+    date_prefix = date_prefix or datetime.now().strftime('%Y%m%d')
+    return f"ORD{date_prefix}{uuid.uuid4().hex[:8].upper()}"
+
+def reserve_stock(product_id, quantity):
+    """Atomically take quantity from a product if enough is left.
+    
+    The check and the decrement are a single conditional UPDATE, so
+    concurrent buyers can never oversell. Returns True when reserved.
+    """
+    result = db.session.execute(
+        db.update(MilletProduct)
+        .where(MilletProduct.id == product_id, MilletProduct.quantity >= quantity)
+        .values(
+            quantity=MilletProduct.quantity - quantity,
+            status=db.case((MilletProduct.quantity - quantity <= 0, 'sold'), else_=MilletProduct.status)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+ORDER_RETRY_ATTEMPTS = 5
+ORDER_RETRY_BACKOFF = 0.01  # seconds, doubled after every attempt
+
+order_metrics = Counters('created', 'insufficient', 'conflicts', 'retries', 'busy')
+
 @app.route('/api/orders', methods=['POST'])
 @token_required
 def create_order(current_user):
     data = request.get_json()
-    product = MilletProduct.query.get(data['product_id'])
+    quantity = data['quantity']
     
-    if not product:
-        return jsonify({'message': 'Product not found!'}), 404
+    if not isinstance(quantity, (int, float)) or quantity <= 0:
+        return jsonify({'message': 'Quantity must be a positive number!'}), 400
     
-    if product.quantity < data['quantity']:
-        return jsonify({'message': 'Insufficient quantity available!'}), 400
+    # Lock contention (SQLite "database is locked", serialization failures)
+    # rolls the whole attempt back and retries with jittered backoff
+    for attempt in range(ORDER_RETRY_ATTEMPTS):
+        try:
+            product = db.session.get(MilletProduct, data['product_id'])
+            
+            if not product:
+                return jsonify({'message': 'Product not found!'}), 404
+            
+            if product.quantity < quantity:
+                order_metrics.incr('insufficient')
+                return jsonify({'message': 'Insufficient quantity available!'}), 400
+            
+            # The read above may already be stale; the conditional UPDATE is
+            # what actually guarantees the stock is there
+            if not reserve_stock(product.id, quantity):
+                db.session.rollback()
+                order_metrics.incr('conflicts')
+                return jsonify({'message': 'Stock was taken by a concurrent order, please retry!'}), 409
+            
+            order_number = generate_order_number()
+            order = Order(
+                order_number=order_number,
+                buyer_id=current_user.id,
+                seller_id=product.farmer_id,
+                product_id=product.id,
+                quantity=quantity,
+                total_amount=quantity * product.price_per_unit,
+                delivery_address=data['delivery_address']
+            )
+            
+            sold_out = product.status == 'available' and db.session.query(MilletProduct.status).filter_by(
+                id=product.id
+            ).scalar() == 'sold'
+            
+            db.session.add(order)
+            bump_stats(current_user.id, orders_as_buyer=1, pending_orders=1)
+            bump_stats(product.farmer_id, orders_as_seller=1, active_listings=-1 if sold_out else 0)
+            bump_stats(GLOBAL_STATS_ID, total_orders=1, active_listings=-1 if sold_out else 0)
+            bump_version('products')
+            db.session.commit()
+            
+            order_metrics.incr('created')
+            return jsonify({'message': 'Order created successfully!', 'order_number': order_number}), 201
+        
+        except OperationalError:
+            db.session.rollback()
+            order_metrics.incr('retries')
+            time.sleep(ORDER_RETRY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
     
-    order_number = f"ORD{datetime.now().strftime('%Y%m%d')}{uuid.uuid4().hex[:8].upper()}"
+    order_metrics.incr('busy')
+    return jsonify({'message': 'Server is busy, please retry shortly!'}), 503
+
+BULK_ORDER_MAX_LINES = 500
+
+@app.route('/api/orders/bulk', methods=['POST'])
+@token_required
+def create_bulk_order(current_user):
+    data = request.get_json()
+    items = data.get('items') if isinstance(data, dict) else None
     
-    order = Order(
-        order_number=order_number,
-        buyer_id=current_user.id,
-        seller_id=product.farmer_id,
-        product_id=product.id,
-        quantity=data['quantity'],
-        total_amount=data['quantity'] * product.price_per_unit,
-        delivery_address=data['delivery_address']
-    )
+    if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+        return jsonify({'message': 'A list of order items is required!'}), 400
+    if len(items) > BULK_ORDER_MAX_LINES:
+        return jsonify({'message': f'At most {BULK_ORDER_MAX_LINES} items per order!'}), 400
+    atomic = bool(data.get('atomic', False))
+    
+    # One query for every product referenced by the order; ids that are not
+    # integers cannot match a product and fail below as not found
+    item_product_ids = [item.get('product_id') if isinstance(item.get('product_id'), int) else None
+                        for item in items]
+    product_ids = {product_id for product_id in item_product_ids if product_id is not None}
+    products = {
+        product.id: product
+        for product in MilletProduct.query.filter(MilletProduct.id.in_(product_ids))
+    }
+    
+    date_prefix = datetime.now().strftime('%Y%m%d')
+    results = []
+    orders = []
+    for index, (item, product_id) in enumerate(zip(items, item_product_ids)):
+        product = products.get(product_id)
+        quantity = item.get('quantity')
+        delivery_address = item.get('delivery_address', data.get('delivery_address'))
+        
+        if not product:
+            message = 'Product not found!'
+        elif not isinstance(quantity, (int, float)) or quantity <= 0:
+            message = 'Quantity must be a positive number!'
+        elif not delivery_address:
+            message = 'Delivery address is required!'
+        elif not reserve_stock(product.id, quantity):
+            message = 'Insufficient quantity available!'
+        else:
+            order = Order(
+                order_number=generate_order_number(date_prefix),
+                buyer_id=current_user.id,
+                seller_id=product.farmer_id,
+                product_id=product.id,
+                quantity=quantity,
+                total_amount=quantity * product.price_per_unit,
+                delivery_address=delivery_address
+            )
+            orders.append(order)
+            results.append({'index': index, 'product_id': product.id, 'status': 'created',
+                            'order_number': order.order_number})
+            continue
+        
+        results.append({'index': index, 'product_id': item.get('product_id'), 'status': 'failed',
+                        'message': message})
+    
+    failed = len(items) - len(orders)
+    if not orders or (atomic and failed):
+        db.session.rollback()
+        return jsonify({'message': 'No orders were created!', 'created': 0, 'failed': len(items),
+                        'results': results}), 409
     
-    # Update product quantity
-    product.quantity -= data['quantity']
-    if product.quantity <= 0:
-        product.status = 'sold'
+    # Listings that were available before this order and are now sold out
+    reserved_ids = {order.product_id for order in orders}
+    sold_ids = {product_id for (product_id,) in db.session.query(MilletProduct.id).filter(
+        MilletProduct.id.in_(reserved_ids), MilletProduct.status == 'sold')}
     
-    db.session.add(order)
+    seller_deltas = defaultdict(lambda: {'orders_as_seller': 0, 'active_listings': 0})
+    for order in orders:
+        seller_deltas[order.seller_id]['orders_as_seller'] += 1
+    for product_id in sold_ids:
+        if products[product_id].status == 'available':
+            seller_deltas[products[product_id].farmer_id]['active_listings'] -= 1
+    
+    db.session.add_all(orders)
+    bump_stats(current_user.id, orders_as_buyer=len(orders), pending_orders=len(orders))
+    for seller_id, deltas in seller_deltas.items():
+        bump_stats(seller_id, **deltas)
+    bump_stats(GLOBAL_STATS_ID, total_orders=len(orders),
+               active_listings=sum(deltas['active_listings'] for deltas in seller_deltas.values()))
+    bump_version('products')
     db.session.commit()
     
-    return jsonify({'message': 'Order created successfully!', 'order_number': order_number}), 201
+    return jsonify({'message': 'Bulk order processed!', 'created': len(orders), 'failed': failed,
+                    'results': results}), 201
+
+ORDERS_DEFAULT_LIMIT = 50
+ORDERS_MAX_LIMIT = 500
+ORDERS_STREAM_CHUNK = 1000
+
+def serialize_order(order):
+    return {
+        'id': order.id,
+        'order_number': order.order_number,
+        'product_name': order.product.name,
+        'quantity': order.quantity,
+        'total_amount': order.total_amount,
+        'status': order.status,
+        'payment_status': order.payment_status,
+        'order_date': order.order_date,
+        'delivery_date': order.delivery_date,
+        'buyer_name': order.buyer.full_name,
+        'seller_name': order.seller.full_name
+    }
 
 @app.route('/api/orders', methods=['GET'])
 @token_required
 def get_orders(current_user):
+    args = request.args
+    
+    # Product, buyer and seller are loaded in the same query as the orders
+    query = Order.query.options(
+        db.joinedload(Order.product),
+        db.joinedload(Order.buyer),
+        db.joinedload(Order.seller)
+    )
+    
     if current_user.user_type == 'farmer':
-        orders = Order.query.filter_by(seller_id=current_user.id).all()
+        query = query.filter(Order.seller_id == current_user.id)
     elif current_user.user_type in ['buyer', 'consumer']:
-        orders = Order.query.filter_by(buyer_id=current_user.id).all()
-    else:
-        orders = Order.query.all()
+        query = query.filter(Order.buyer_id == current_user.id)
     
-    result = []
-    for order in orders:
-        result.append({
-            'id': order.id,
-            'order_number': order.order_number,
-            'product_name': order.product.name,
-            'quantity': order.quantity,
-            'total_amount': order.total_amount,
-            'status': order.status,
-            'payment_status': order.payment_status,
-            'order_date': order.order_date.isoformat(),
-            'delivery_date': order.delivery_date.isoformat() if order.delivery_date else None,
-            'buyer_name': order.buyer.full_name,
-            'seller_name': order.seller.full_name
-        })
+    if args.get('status'):
+        query = query.filter(Order.status == args['status'])
+    if args.get('payment_status'):
+        query = query.filter(Order.payment_status == args['payment_status'])
+    try:
+        if args.get('from_date'):
+            query = query.filter(Order.order_date >= datetime.strptime(args['from_date'], '%Y-%m-%d'))
+        if args.get('to_date'):
+            to_date = datetime.strptime(args['to_date'], '%Y-%m-%d') + timedelta(days=1)
+            query = query.filter(Order.order_date < to_date)
+    except ValueError:
+        return jsonify({'message': 'Dates must be in YYYY-MM-DD format!'}), 400
     
-    return jsonify(result)
+    if args.get('cursor'):
+        try:
+            value, row_id = decode_cursor(args['cursor'])
+            cursor = (datetime.fromisoformat(value), row_id)
+        except (ValueError, TypeError):
+            return jsonify({'message': 'Invalid cursor!'}), 400
+        query = keyset_filter(query, Order.order_date, Order.id, True, cursor)
+    
+    query = query.order_by(Order.order_date.desc(), Order.id.desc())
+    
+    # Full exports are streamed in chunks instead of being built in memory
+    if args.get('stream', '').lower() == 'true':
+        def generate():
+            yield '['
+            for index, order in enumerate(query.yield_per(ORDERS_STREAM_CHUNK)):
+                yield (',' if index else '') + app.json.dumps(serialize_order(order))
+            yield ']'
+        return app.response_class(stream_with_context(generate()), mimetype='application/json')
+    
+    limit = parse_limit(ORDERS_DEFAULT_LIMIT, ORDERS_MAX_LIMIT)
+    orders = query.limit(limit + 1).all()
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+    
+    response = jsonify([serialize_order(order) for order in orders])
+    if has_more:
+        response.headers['X-Next-Cursor'] = encode_cursor(orders[-1].order_date, orders[-1].id)
+    return response
 
 @app.route('/api/traceability/<int:product_id>', methods=['GET'])
+@conditional(lambda product_id: f'traceability:{product_id}', max_age=60)
 def get_traceability(product_id):
     records = TraceabilityRecord.query.filter_by(product_id=product_id).order_by(TraceabilityRecord.timestamp).all()
     
@@ -368,7 +1467,7 @@ def get_traceability(product_id):
         result.append({
             'stage': record.stage,
             'location': record.location,
-            'timestamp': record.timestamp.isoformat(),
+            'timestamp': record.timestamp,
             'operator': record.operator,
             'notes': record.notes,
             'certificate_url': record.certificate_url
@@ -377,6 +1476,7 @@ def get_traceability(product_id):
     return jsonify(result)
 
 @app.route('/api/schemes', methods=['GET'])
+@conditional('schemes', max_age=3600)
 def get_schemes():
     schemes = GovernmentScheme.query.filter_by(is_active=True).all()
     result = []
@@ -389,13 +1489,14 @@ def get_schemes():
             'eligibility_criteria': scheme.eligibility_criteria,
             'benefits': scheme.benefits,
             'application_process': scheme.application_process,
-            'deadline': scheme.deadline.isoformat() if scheme.deadline else None,
-            'created_at': scheme.created_at.isoformat()
+            'deadline': scheme.deadline,
+            'created_at': scheme.created_at
         })
     
     return jsonify(result)
 
 @app.route('/api/market-prices', methods=['GET'])
+@conditional('market_prices', max_age=300)
 def get_market_prices():
     state = request.args.get('state')
     district = request.args.get('district')
@@ -415,41 +1516,423 @@ def get_market_prices():
             'state': price.state,
             'district': price.district,
             'price_per_kg': price.price_per_kg,
-            'date': price.date.isoformat(),
+            'date': price.date,
             'source': price.source
         })
     
     return jsonify(result)
 
+# Market price rollups
+# bucket -> (start of the bucket containing a date, end of a bucket given its start)
+PRICE_BUCKETS = {
+    'day': (lambda day: day, lambda start: start + timedelta(days=1)),
+    'week': (lambda day: day - timedelta(days=day.weekday()), lambda start: start + timedelta(days=7)),
+    'month': (lambda day: day.replace(day=1), lambda start: (start + timedelta(days=32)).replace(day=1)),
+}
+# Default look-back when a series request has no start date
+PRICE_SERIES_DEFAULT_SPAN = {'day': 90, 'week': 7 * 52, 'month': 730}
+PRICE_SERIES_MAX_POINTS = 2000
+
+def aggregate_price_buckets(points):
+    """Fold (date, price) points into {(bucket, bucket_start): [count, sum, min, max]}"""
+    totals = {}
+    for day, price in points:
+        for bucket, (bucket_start, _) in PRICE_BUCKETS.items():
+            key = (bucket, bucket_start(day))
+            total = totals.get(key)
+            if total is None:
+                totals[key] = [1, price, price, price]
+            else:
+                total[0] += 1
+                total[1] += price
+                if price < total[2]:
+                    total[2] = price
+                if price > total[3]:
+                    total[3] = price
+    return totals
+
+def price_rollup_rows(series, totals):
+    millet_type, state, district = series
+    return [
+        {'bucket': bucket, 'bucket_start': bucket_start, 'millet_type': millet_type, 'state': state,
+         'district': district, 'sample_count': count, 'price_sum': total, 'price_min': low, 'price_max': high}
+        for (bucket, bucket_start), (count, total, low, high) in totals.items()
+    ]
+
+def last_bucket_start(bucket, end):
+    """Start of the latest bucket that ends on or before end"""
+    bucket_start, bucket_end = PRICE_BUCKETS[bucket]
+    start = bucket_start(end - timedelta(days=1))
+    return start if bucket_end(start) <= end else bucket_start(start - timedelta(days=1))
+
+def refresh_price_rollups(observations):
+    """Recompute the rollup buckets touched by (millet_type, state, district, date) observations.
+    
+    Each touched series is re-aggregated from raw prices over a window that
+    covers the day, week and month of every touched date; every bucket lying
+    wholly inside that window is replaced. Series sharing a window are
+    handled with one select, one delete per bucket and one insert. Runs
+    inside the caller's transaction.
+    """
+    touched = defaultdict(set)
+    for millet_type, state, district, day in observations:
+        touched[(millet_type, state, district)].add(day)
+    
+    windows = defaultdict(list)
+    for series, days in touched.items():
+        first = min(PRICE_BUCKETS['week'][0](min(days)), PRICE_BUCKETS['month'][0](min(days)))
+        last = max(PRICE_BUCKETS['week'][1](PRICE_BUCKETS['week'][0](max(days))),
+                   PRICE_BUCKETS['month'][1](PRICE_BUCKETS['month'][0](max(days))))
+        windows[(first, last)].append(series)
+    
+    price_series = db.tuple_(MarketPrice.millet_type, MarketPrice.state, MarketPrice.district)
+    rollup_series = db.tuple_(MarketPriceRollup.millet_type, MarketPriceRollup.state, MarketPriceRollup.district)
+    for (first, last), series_list in windows.items():
+        points = defaultdict(list)
+        for millet_type, state, district, day, price in db.session.query(
+            MarketPrice.millet_type, MarketPrice.state, MarketPrice.district, MarketPrice.date, MarketPrice.price_per_kg
+        ).filter(price_series.in_(series_list), MarketPrice.date >= first, MarketPrice.date < last):
+            points[(millet_type, state, district)].append((day, price))
+        
+        limits = {bucket: last_bucket_start(bucket, last) for bucket in PRICE_BUCKETS}
+        for bucket, limit in limits.items():
+            db.session.execute(db.delete(MarketPriceRollup).where(
+                rollup_series.in_(series_list),
+                MarketPriceRollup.bucket == bucket,
+                MarketPriceRollup.bucket_start >= first,
+                MarketPriceRollup.bucket_start <= limit
+            ))
+        
+        rows = []
+        for series in series_list:
+            totals = aggregate_price_buckets(points[series])
+            rows += price_rollup_rows(series, {
+                key: total for key, total in totals.items() if first <= key[1] <= limits[key[0]]
+            })
+        if rows:
+            db.session.execute(MarketPriceRollup.__table__.insert(), rows)
+
+def rebuild_price_rollups(connection=None):
+    """Recompute every rollup from raw market prices, one series at a time. Runs in
+    the transaction of the given connection (migrations) or commits the session."""
+    executor = db.session if connection is None else connection
+    prices = MarketPrice.__table__
+    executor.execute(MarketPriceRollup.__table__.delete())
+    series_list = executor.execute(db.select(prices.c.millet_type, prices.c.state, prices.c.district).distinct()).all()
+    for millet_type, state, district in series_list:
+        points = executor.execute(db.select(prices.c.date, prices.c.price_per_kg).where(
+            prices.c.millet_type == millet_type, prices.c.state == state, prices.c.district == district
+        ))
+        rows = price_rollup_rows((millet_type, state, district), aggregate_price_buckets(points))
+        executor.execute(MarketPriceRollup.__table__.insert(), rows)
+    if connection is None:
+        db.session.commit()
+    return len(series_list)
+
+@app.cli.command('rebuild-price-rollups')
+def rebuild_price_rollups_command():
+    """Recompute daily, weekly and monthly market price rollups from raw prices"""
+    count = rebuild_price_rollups()
+    print(f"Rebuilt rollups for {count} price series")
+
+@app.route('/api/market-prices/series', methods=['GET'])
+@conditional('market_prices', max_age=300)
+def get_market_price_series():
+    args = request.args
+    bucket = args.get('bucket', 'day')
+    if bucket not in PRICE_BUCKETS:
+        return jsonify({'message': 'bucket must be day, week or month!'}), 400
+    
+    try:
+        end = datetime.strptime(args['to'], '%Y-%m-%d').date() if args.get('to') else datetime.now().date()
+        if args.get('from'):
+            start = datetime.strptime(args['from'], '%Y-%m-%d').date()
+        else:
+            start = end - timedelta(days=PRICE_SERIES_DEFAULT_SPAN[bucket])
+    except ValueError:
+        return jsonify({'message': 'Dates must be in YYYY-MM-DD format!'}), 400
+    
+    # Align the start so the first bucket is complete
+    start = PRICE_BUCKETS[bucket][0](start)
+    
+    query = db.session.query(
+        MarketPriceRollup.millet_type,
+        MarketPriceRollup.bucket_start,
+        db.func.sum(MarketPriceRollup.sample_count),
+        db.func.sum(MarketPriceRollup.price_sum),
+        db.func.min(MarketPriceRollup.price_min),
+        db.func.max(MarketPriceRollup.price_max)
+    ).filter(
+        MarketPriceRollup.bucket == bucket,
+        MarketPriceRollup.bucket_start >= start,
+        MarketPriceRollup.bucket_start <= end
+    )
+    for column in ('millet_type', 'state', 'district'):
+        if args.get(column):
+            query = query.filter(getattr(MarketPriceRollup, column) == args[column])
+    
+    rows = query.group_by(MarketPriceRollup.millet_type, MarketPriceRollup.bucket_start).order_by(
+        MarketPriceRollup.millet_type, MarketPriceRollup.bucket_start
+    ).limit(PRICE_SERIES_MAX_POINTS).all()
+    
+    series = {}
+    for millet_type, bucket_start, count, total, low, high in rows:
+        series.setdefault(millet_type, []).append({
+            'date': bucket_start,
+            'avg': round(total / count, 2),
+            'min': round(low, 2),
+            'max': round(high, 2),
+            'samples': count
+        })
+    
+    return jsonify({
+        'bucket': bucket,
+        'from': start,
+        'to': end,
+        'state': args.get('state'),
+        'district': args.get('district'),
+        'series': [{'millet_type': millet_type, 'points': points} for millet_type, points in series.items()]
+    })
+
+# Market price bulk import
+MARKET_PRICE_FIELDS = ('millet_type', 'state', 'district', 'price_per_kg', 'date', 'source')
+MARKET_PRICE_KEY = ('millet_type', 'state', 'district', 'date', 'source')
+MARKET_PRICE_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y')
+IMPORT_CHUNK_SIZE = 5000
+IMPORT_MAX_RECORD_LINES = 50  # a quoted CSV field may span lines, up to this many
+
+def parse_market_price(raw):
+    """Validate one imported record and convert it to MarketPrice column values"""
+    if not isinstance(raw, dict):
+        raise ValueError('record is not an object')
+    missing = [field for field in MARKET_PRICE_FIELDS if not str(raw.get(field) or '').strip()]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    
+    date_text = str(raw['date']).strip()
+    for date_format in MARKET_PRICE_DATE_FORMATS:
+        try:
+            price_date = datetime.strptime(date_text, date_format).date()
+            break
+        except ValueError:
+            continue
+    else:
+        raise ValueError(f"unrecognised date {date_text!r}")
+    
+    price_per_kg = float(raw['price_per_kg'])
+    if price_per_kg <= 0:
+        raise ValueError('price_per_kg must be positive')
+    
+    return {
+        'millet_type': str(raw['millet_type']).strip(),
+        'state': str(raw['state']).strip(),
+        'district': str(raw['district']).strip(),
+        'price_per_kg': price_per_kg,
+        'date': price_date,
+        'source': str(raw['source']).strip()
+    }
+
+def iter_market_price_records(stream, file_format, offset=0):
+    """Yield (record, byte offset after the record) from a binary CSV or JSONL stream.
+    
+    Records are read a line at a time so memory stays flat, and the offsets
+    let an interrupted import resume by seeking instead of re-reading.
+    """
+    header = None
+    if file_format == 'csv':
+        header_line = stream.readline()
+        header = next(csv.reader([header_line.decode('utf-8-sig')]))
+        header = [column.strip() for column in header]
+        position = len(header_line)
+    else:
+        position = 0
+    
+    if offset > position:
+        stream.seek(offset)
+        position = offset
+    
+    for line in iter(stream.readline, b''):
+        position += len(line)
+        text = line.decode('utf-8')
+        if file_format == 'csv':
+            # An odd number of quotes means a quoted field continues on the next line
+            lines = [text]
+            while text.count('"') % 2 and len(lines) < IMPORT_MAX_RECORD_LINES:
+                line = stream.readline()
+                if not line:
+                    break
+                position += len(line)
+                lines.append(line.decode('utf-8'))
+                text = ''.join(lines)
+            if not text.strip():
+                continue
+            yield dict(zip(header, next(csv.reader(text.strip().splitlines(True))))), position
+        else:
+            text = text.strip()
+            if not text:
+                continue
+            try:
+                yield json.loads(text), position
+            except ValueError:
+                yield {}, position
+
+def upsert_market_prices(rows):
+    """Insert rows, updating the price of observations that already exist"""
+    insert = upsert_insert()
+    if insert is None:
+        raise RuntimeError(f"Market price upserts are not supported on {db.engine.dialect.name}")
+    
+    statement = insert(MarketPrice.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(MARKET_PRICE_KEY),
+        set_={'price_per_kg': statement.excluded.price_per_kg}
+    )
+    db.session.execute(statement, rows)
+
+def import_market_prices(stream, file_format, chunk_size=IMPORT_CHUNK_SIZE, offset=0, on_chunk=None, totals=None):
+    """Stream market prices into the database, committing once per chunk.
+    
+    Rows are upserted on (millet_type, state, district, date, source), so
+    re-importing a file or resuming after a crash never duplicates data.
+    on_chunk(progress) is called after every commit with the running totals
+    and the byte offset that a resumed import should start from; a resumed
+    import passes the checkpointed totals back in to continue counting.
+    """
+    progress = {'rows': 0, 'imported': 0, 'skipped': 0, 'errors': [], 'offset': offset}
+    progress.update({name: (totals or {}).get(name, 0) for name in ('rows', 'imported', 'skipped')})
+    # Keyed by observation so a chunk never upserts the same row twice
+    chunk = {}
+    
+    def flush(position):
+        if chunk:
+            upsert_market_prices(list(chunk.values()))
+            refresh_price_rollups(key[:4] for key in chunk)
+            bump_version('market_prices')
+            db.session.commit()
+            progress['imported'] += len(chunk)
+            chunk.clear()
+        progress['offset'] = position
+        if on_chunk:
+            on_chunk(progress)
+    
+    position = offset
+    for raw, position in iter_market_price_records(stream, file_format, offset):
+        progress['rows'] += 1
+        try:
+            row = parse_market_price(raw)
+            chunk[tuple(row[field] for field in MARKET_PRICE_KEY)] = row
+        except (ValueError, TypeError) as e:
+            progress['skipped'] += 1
+            if len(progress['errors']) < 20:
+                progress['errors'].append({'offset': position, 'error': str(e)})
+        if len(chunk) >= chunk_size:
+            flush(position)
+    flush(position)
+    return progress
+
+def market_price_format(filename, requested=None):
+    file_format = (requested or os.path.splitext(filename)[1].lstrip('.')).lower()
+    if file_format == 'json':
+        file_format = 'jsonl'
+    if file_format not in ('csv', 'jsonl'):
+        raise ValueError('File format must be csv or jsonl')
+    return file_format
+
+@app.cli.command('import-market-prices')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension')
+@click.option('--chunk-size', default=IMPORT_CHUNK_SIZE, show_default=True)
+@click.option('--restart', is_flag=True, help='Ignore any checkpoint and import from the beginning')
+def import_market_prices_command(path, file_format, chunk_size, restart):
+    """Stream a CSV or JSONL file of mandi prices into MarketPrice"""
+    file_format = market_price_format(path, file_format)
+    checkpoint_path = f"{path}.checkpoint"
+    stat = os.stat(path)
+    fingerprint = {'size': stat.st_size, 'mtime': stat.st_mtime}
+    
+    offset = 0
+    totals = None
+    if not restart and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('file') == fingerprint:
+            offset = checkpoint['offset']
+            totals = checkpoint
+            print(f"Resuming from byte {offset} ({checkpoint['rows']} rows already processed)")
+    
+    started = time.perf_counter()
+    
+    def on_chunk(progress):
+        temporary_path = f"{checkpoint_path}.tmp"
+        with open(temporary_path, 'w') as f:
+            json.dump({'file': fingerprint, 'offset': progress['offset'], 'rows': progress['rows'],
+                       'imported': progress['imported'], 'skipped': progress['skipped']}, f)
+        os.replace(temporary_path, checkpoint_path)
+        elapsed = time.perf_counter() - started
+        print(f"{progress['offset'] / max(stat.st_size, 1):6.1%}  {progress['imported']} imported, "
+              f"{progress['skipped']} skipped, {progress['rows'] / max(elapsed, 1e-9):.0f} rows/s")
+    
+    with open(path, 'rb') as f:
+        progress = import_market_prices(f, file_format, chunk_size, offset, on_chunk, totals)
+    
+    os.remove(checkpoint_path)
+    for error in progress['errors']:
+        print(f"skipped record ending at byte {error['offset']}: {error['error']}")
+    print(f"Done: {progress['imported']} imported, {progress['skipped']} skipped")
+
+@app.route('/api/admin/market-prices/import', methods=['POST'])
+@token_required
+def import_market_prices_upload(current_user):
+    if current_user.user_type != 'admin':
+        return jsonify({'message': 'Only admins can import market prices!'}), 403
+    
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file provided'}), 400
+    
+    file = request.files['file']
+    try:
+        file_format = market_price_format(file.filename, request.form.get('format'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    chunk_size = request.form.get('chunk_size', IMPORT_CHUNK_SIZE, type=int)
+    progress = import_market_prices(file.stream, file_format, chunk_size)
+    
+    return jsonify({
+        'message': 'Market prices imported!',
+        'rows': progress['rows'],
+        'imported': progress['imported'],
+        'skipped': progress['skipped'],
+        'errors': progress['errors']
+    })
+
 @app.route('/api/dashboard/stats', methods=['GET'])
 @token_required
 def get_dashboard_stats(current_user):
     stats = {}
     
+    if current_user.user_type == 'admin':
+        counters = db.session.get(DashboardStats, GLOBAL_STATS_ID)
+    else:
+        counters = db.session.get(DashboardStats, current_user.id)
+    counter = lambda name: getattr(counters, name) if counters else 0
+    
     if current_user.user_type == 'farmer':
-        stats['total_products'] = MilletProduct.query.filter_by(farmer_id=current_user.id).count()
-        stats['active_listings'] = MilletProduct.query.filter_by(farmer_id=current_user.id, status='available').count()
-        stats['total_orders'] = Order.query.filter_by(seller_id=current_user.id).count()
-        stats['total_revenue'] = db.session.query(db.func.sum(Order.total_amount)).filter_by(
-            seller_id=current_user.id, 
-            payment_status='paid'
-        ).scalar() or 0
+        stats['total_products'] = counter('total_products')
+        stats['active_listings'] = counter('active_listings')
+        stats['total_orders'] = counter('orders_as_seller')
+        stats['total_revenue'] = counter('revenue')
     
     elif current_user.user_type in ['buyer', 'consumer']:
-        stats['total_orders'] = Order.query.filter_by(buyer_id=current_user.id).count()
-        stats['pending_orders'] = Order.query.filter_by(buyer_id=current_user.id, status='pending').count()
-        stats['total_spent'] = db.session.query(db.func.sum(Order.total_amount)).filter_by(
-            buyer_id=current_user.id, 
-            payment_status='paid'
-        ).scalar() or 0
+        stats['total_orders'] = counter('orders_as_buyer')
+        stats['pending_orders'] = counter('pending_orders')
+        stats['total_spent'] = counter('spent')
     
     elif current_user.user_type == 'admin':
-        stats['total_users'] = User.query.count()
-        stats['total_products'] = MilletProduct.query.count()
-        stats['total_orders'] = Order.query.count()
-        stats['total_revenue'] = db.session.query(db.func.sum(Order.total_amount)).filter_by(
-            payment_status='paid'
-        ).scalar() or 0
+        stats['total_users'] = counter('total_users')
+        stats['total_products'] = counter('total_products')
+        stats['total_orders'] = counter('total_orders')
+        stats['total_revenue'] = counter('revenue')
     
     return jsonify(stats)
 
@@ -467,9 +1950,21 @@ def create_blockchain_batch(current_user):
     # Generate batch ID
     batch_id = f"BATCH_{product_id}_{int(datetime.now().timestamp())}"
     
-    # Simulate blockchain transaction (in real implementation, call blockchain service)
-    transaction_hash = hashlib.sha256(f"{batch_id}_{datetime.now()}".encode()).hexdigest()[:20]
-    block_number = 12345  # Simulated block number
+    harvest_date = product.harvest_date
+    try:
+        transaction_hash, block_number = anchor_chain.create_batch({
+            'batchId': batch_id,
+            'farmerId': str(product.farmer_id),
+            'milletType': product.type,
+            'variety': product.variety,
+            'harvestDate': int(datetime(harvest_date.year, harvest_date.month, harvest_date.day,
+                                        tzinfo=timezone.utc).timestamp()),
+            'qualityGrade': product.quality_grade,
+            'organicCertified': bool(product.organic_certified)
+        })
+    except AnchorServiceError:
+        db.session.rollback()
+        return jsonify({'message': 'Blockchain service unavailable!'}), 503
     
     # Create blockchain batch record
     blockchain_batch = BlockchainBatch(
@@ -507,27 +2002,489 @@ def add_blockchain_trace(current_user):
     )
     
     db.session.add(record)
+    bump_version(f"traceability:{data['product_id']}")
     db.session.commit()
     
     return jsonify({'message': 'Traceability record added to blockchain!'})
 
+TRACE_BULK_MAX_EVENTS = 1000
+TRACE_BULK_ATTEMPTS = 2
+
+def parse_trace_timestamp(value):
+    """ISO 8601 scan time as naive UTC, the way record timestamps are stored"""
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+def ingest_trace_events(events, request_key):
+    """Validate trace events and insert the new ones; returns (rows inserted, per-event results)"""
+    keys = [event.get('idempotency_key') or (f"{request_key}:{index}" if request_key else None)
+            for index, event in enumerate(events)]
+    
+    # One query for every product and one for every key already recorded
+    product_ids = {event.get('product_id') for event in events}
+    known_products = {product_id for (product_id,) in db.session.query(MilletProduct.id).filter(
+        MilletProduct.id.in_(product_ids))}
+    recorded = dict(db.session.query(TraceabilityRecord.idempotency_key, TraceabilityRecord.blockchain_hash).filter(
+        TraceabilityRecord.idempotency_key.in_({key for key in keys if key})))
+    
+    now = datetime.now()
+    rows = []
+    results = []
+    for index, (event, key) in enumerate(zip(events, keys)):
+        result = {'index': index, 'product_id': event.get('product_id'), 'idempotency_key': key}
+        results.append(result)
+        
+        if key in recorded:
+            result.update(status='duplicate', blockchain_hash=recorded[key])
+            continue
+        
+        message = None
+        if event.get('product_id') not in known_products:
+            message = 'Product not found!'
+        elif not all(isinstance(event.get(field), str) and event[field].strip()
+                     for field in ('stage', 'location', 'operator')):
+            message = 'Stage, location and operator are required!'
+        elif key is not None and len(key) > 100:
+            message = 'Idempotency key is too long!'
+        else:
+            try:
+                timestamp = parse_trace_timestamp(event['timestamp']) if event.get('timestamp') else datetime.utcnow()
+            except (TypeError, ValueError):
+                message = 'Timestamp must be ISO 8601!'
+        if message:
+            result.update(status='failed', message=message)
+            continue
+        
+        blockchain_hash = hashlib.sha256(f"{event['product_id']}_{event['stage']}_{now}_{index}".encode()).hexdigest()[:20]
+        rows.append({
+            'product_id': event['product_id'],
+            'stage': event['stage'],
+            'location': event['location'],
+            'timestamp': timestamp,
+            'operator': event['operator'],
+            'notes': event.get('notes'),
+            'certificate_url': event.get('certificate_url'),
+            'blockchain_hash': blockchain_hash,
+            'is_verified': True,
+            'idempotency_key': key
+        })
+        if key is not None:
+            # A key repeated later in the same batch is a duplicate of this event
+            recorded[key] = blockchain_hash
+        result.update(status='created', blockchain_hash=blockchain_hash)
+    
+    if rows:
+        db.session.execute(TraceabilityRecord.__table__.insert(), rows)
+        for product_id in {row['product_id'] for row in rows}:
+            bump_version(f"traceability:{product_id}")
+    db.session.commit()
+    return len(rows), results
+
+@app.route('/api/blockchain/add-trace/bulk', methods=['POST'])
+@token_required
+def add_blockchain_trace_bulk(current_user):
+    data = request.get_json()
+    events = data.get('events') if isinstance(data, dict) else None
+    
+    if not isinstance(events, list) or not events or not all(isinstance(event, dict) for event in events):
+        return jsonify({'message': 'A list of trace events is required!'}), 400
+    if len(events) > TRACE_BULK_MAX_EVENTS:
+        return jsonify({'message': f'At most {TRACE_BULK_MAX_EVENTS} events per request!'}), 400
+    
+    # A concurrent retry can insert the same key first; the next attempt sees it as a duplicate
+    for attempt in range(TRACE_BULK_ATTEMPTS):
+        try:
+            created, results = ingest_trace_events(events, request.headers.get('Idempotency-Key'))
+            break
+        except IntegrityError:
+            db.session.rollback()
+            if attempt == TRACE_BULK_ATTEMPTS - 1:
+                return jsonify({'message': 'Conflicting concurrent upload, please retry!'}), 409
+    
+    duplicates = sum(result['status'] == 'duplicate' for result in results)
+    failed = len(events) - created - duplicates
+    summary = {'created': created, 'duplicates': duplicates, 'failed': failed, 'results': results}
+    if created:
+        return jsonify(dict(summary, message='Traceability records added to blockchain!')), 201
+    if duplicates:
+        return jsonify(dict(summary, message='All events were already recorded!')), 200
+    return jsonify(dict(summary, message='No traceability records were added!')), 400
+
+class AnchorServiceError(Exception):
+    """The blockchain service could not record a transaction"""
+
+class LocalLedger:
+    """Stand-in chain: an append-only table of blocks, each hashing the one before it"""
+    
+    network = 'local'
+    
+    @staticmethod
+    def block_hash(number, previous_hash, kind, payload_hash, created_at):
+        return hashlib.sha256(f"{number}|{previous_hash}|{kind}|{payload_hash}|{created_at.isoformat()}".encode()).hexdigest()
+    
+    def append(self, kind, payload_hash):
+        """Add a block in the caller's transaction; returns (block hash, block number)"""
+        previous = db.session.query(LedgerBlock.number, LedgerBlock.block_hash).order_by(
+            LedgerBlock.number.desc()).first()
+        number, previous_hash = (previous.number + 1, previous.block_hash) if previous else (1, '0' * 64)
+        created_at = datetime.utcnow()
+        block = LedgerBlock(number=number, kind=kind, payload_hash=payload_hash, previous_hash=previous_hash,
+                            block_hash=self.block_hash(number, previous_hash, kind, payload_hash, created_at),
+                            created_at=created_at)
+        db.session.add(block)
+        db.session.flush()  # a concurrent append of the same number fails here
+        return block.block_hash, block.number
+    
+    def anchor_root(self, root, leaf_count, window_id):
+        return self.append('merkle_root', root)
+    
+    def create_batch(self, batch):
+        return self.append('batch', hashlib.sha256(json.dumps(batch, sort_keys=True).encode()).hexdigest())
+    
+    def confirms(self, anchor):
+        """Whether the anchor's block holds its root and still hashes to the recorded value"""
+        block = db.session.get(LedgerBlock, anchor.block_number)
+        return (block is not None and block.kind == 'merkle_root' and block.payload_hash == anchor.merkle_root
+                and block.block_hash == anchor.transaction_hash
+                and block.block_hash == self.block_hash(block.number, block.previous_hash, block.kind,
+                                                        block.payload_hash, block.created_at))
+
+class RemoteChain:
+    """Anchors through blockchain/src/anchorServer.js, the HTTP front of blockchainService.js"""
+    
+    network = 'ethereum'
+    
+    def __init__(self, base_url, timeout, token=''):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        if token:
+            self.session.headers['X-Anchor-Token'] = token
+    
+    def post(self, path, payload):
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise AnchorServiceError(str(e))
+        if response.status_code != 201:
+            raise AnchorServiceError(f"{path} returned {response.status_code}: {response.text[:200]}")
+        data = response.json()
+        return data['transactionHash'], data['blockNumber']
+    
+    def anchor_root(self, root, leaf_count, window_id):
+        return self.post('/anchor', {'root': root, 'leafCount': leaf_count, 'windowId': window_id})
+    
+    def create_batch(self, batch):
+        return self.post('/batches', batch)
+
+if app.config['ANCHOR_SERVICE_URL']:
+    anchor_chain = RemoteChain(app.config['ANCHOR_SERVICE_URL'], app.config['ANCHOR_TIMEOUT'],
+                               app.config['ANCHOR_SERVICE_TOKEN'])
+else:
+    anchor_chain = LocalLedger()
+anchor_metrics = Counters('anchors', 'records', 'failures', 'conflicts')
+
+# Leaves and inner nodes use different prefixes so an inner node can never be
+# passed off as a record; MilletTrace.verifyInclusion hashes the same way
+def merkle_leaf(record):
+    """sha256(0x00 || canonical JSON of the record's traced fields)"""
+    fields = [record.id, record.product_id, record.stage, record.location,
+              record.timestamp.isoformat() if record.timestamp else None,
+              record.operator, record.notes, record.certificate_url]
+    return hashlib.sha256(b'\x00' + json.dumps(fields, separators=(',', ':')).encode()).digest()
+
+def merkle_parent(left, right):
+    return hashlib.sha256(b'\x01' + left + right).digest()
+
+def merkle_levels(leaves):
+    """Tree levels from the leaves up to the root; an unpaired last node is carried up unchanged"""
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [merkle_parent(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+def merkle_proof(levels, index):
+    """Sibling hashes on the path from leaf `index` to the root, lowest level first"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({'hash': level[sibling].hex(), 'position': 'left' if sibling < index else 'right'})
+        index //= 2
+    return proof
+
+def merkle_root_from_proof(leaf, proof):
+    node = leaf
+    for step in proof:
+        sibling = bytes.fromhex(step['hash'])
+        node = merkle_parent(sibling, node) if step['position'] == 'left' else merkle_parent(node, sibling)
+    return node
+
+def anchor_pending_traces(max_leaves=None):
+    """Anchor the oldest unanchored records under one Merkle root; returns the TraceAnchor, or None if none were pending"""
+    records = TraceabilityRecord.query.filter(TraceabilityRecord.anchor_id.is_(None)).order_by(
+        TraceabilityRecord.id).limit(max_leaves or app.config['ANCHOR_MAX_LEAVES']).all()
+    if not records:
+        return None
+    
+    levels = merkle_levels([merkle_leaf(record) for record in records])
+    anchor = TraceAnchor(merkle_root=levels[-1][0].hex(), leaf_count=len(records), first_record_id=records[0].id,
+                         last_record_id=records[-1].id, network=anchor_chain.network)
+    db.session.add(anchor)
+    db.session.flush()
+    
+    # One executemany; the anchor_id guard skips rows another anchorer claimed meanwhile
+    table = TraceabilityRecord.__table__
+    result = db.session.execute(
+        table.update().where(table.c.id == db.bindparam('record_id'), table.c.anchor_id.is_(None)).values(
+            anchor_id=anchor.id, leaf_hash=db.bindparam('leaf'), merkle_index=db.bindparam('position'),
+            merkle_proof=db.bindparam('proof')),
+        [{'record_id': record.id, 'leaf': levels[0][index].hex(), 'position': index,
+          'proof': json.dumps(merkle_proof(levels, index))} for index, record in enumerate(records)]
+    )
+    if db.engine.dialect.supports_sane_multi_rowcount and result.rowcount != len(records):
+        db.session.rollback()
+        anchor_metrics.incr('conflicts')
+        return anchor_pending_traces(max_leaves)
+    # The claim is committed before the chain call, so a root that reaches the chain
+    # always keeps its records; if the call or the commit after it fails, the root
+    # stays unconfirmed and confirm_pending_anchors sends it again
+    db.session.commit()
+    
+    confirm_anchor(anchor)
+    return anchor
+
+def confirm_anchor(anchor):
+    """Record a claimed root on the chain and store its transaction; False if another anchorer stored one first"""
+    leaf_count = anchor.leaf_count
+    transaction_hash, block_number = anchor_chain.anchor_root(
+        anchor.merkle_root, leaf_count, f"TRACE_{anchor.first_record_id}_{anchor.last_record_id}")
+    confirmed = TraceAnchor.query.filter_by(id=anchor.id, transaction_hash=None).update(
+        {'transaction_hash': transaction_hash, 'block_number': block_number})
+    if not confirmed:
+        db.session.rollback()  # also drops the local ledger block appended above
+        anchor_metrics.incr('conflicts')
+        return False
+    db.session.commit()
+    
+    anchor_metrics.incr('anchors')
+    anchor_metrics.incr('records', leaf_count)
+    return True
+
+def confirm_pending_anchors():
+    """Send again the roots whose records were claimed but whose transaction was never stored"""
+    anchors = TraceAnchor.query.filter(TraceAnchor.transaction_hash.is_(None),
+                                       TraceAnchor.network == anchor_chain.network).order_by(TraceAnchor.id).all()
+    for anchor in anchors:
+        confirm_anchor(anchor)
+    return anchors
+
+def anchor_all_pending_traces():
+    """Confirm the roots left over from failed windows, then anchor every pending record,
+    ANCHOR_MAX_LEAVES per root; returns the anchors confirmed or created"""
+    anchors = confirm_pending_anchors()
+    while True:
+        anchor = anchor_pending_traces()
+        if anchor is None:
+            return anchors
+        anchors.append(anchor)
+
+def run_trace_anchorer(interval):
+    """Anchor the records collected during each window of `interval` seconds"""
+    while True:
+        time.sleep(interval)
+        with app.app_context():
+            # Any failure (chain service, lost database connection) only costs this
+            # window; the thread has to survive it to anchor the next one
+            try:
+                anchor_all_pending_traces()
+            except Exception as e:
+                db.session.rollback()
+                anchor_metrics.incr('failures')
+                app.logger.warning('Trace anchoring failed, retrying next window: %s', e)
+
+@app.cli.command('anchor-traces')
+def anchor_traces_command():
+    """Anchor all pending traceability records now"""
+    anchors = anchor_all_pending_traces()
+    for anchor in anchors:
+        print(f"Anchored {anchor.leaf_count} records (#{anchor.first_record_id}-#{anchor.last_record_id}) "
+              f"under root {anchor.merkle_root} in {anchor.network} block {anchor.block_number}")
+    if not anchors:
+        print("No pending traceability records")
+
+@app.route('/api/blockchain/verify/<int:record_id>', methods=['GET'])
+def verify_trace_record(record_id):
+    record = db.session.get(TraceabilityRecord, record_id)
+    if not record:
+        return jsonify({'message': 'Traceability record not found!'}), 404
+    if record.anchor_id is None:
+        return jsonify({'record_id': record_id, 'anchored': False, 'verified': False,
+                        'message': 'Record is waiting for the next anchoring window'})
+    anchor = record.anchor
+    if anchor.transaction_hash is None:
+        return jsonify({'record_id': record_id, 'anchored': False, 'verified': False,
+                        'message': 'Record is waiting for its Merkle root to be confirmed on the chain'})
+    
+    # Recompute the leaf from the stored fields so any later edit breaks the proof
+    proof = json.loads(record.merkle_proof)
+    leaf = merkle_leaf(record)
+    verified = (leaf.hex() == record.leaf_hash
+                and merkle_root_from_proof(leaf, proof).hex() == anchor.merkle_root)
+    if anchor.network == LocalLedger.network:
+        verified = verified and LocalLedger().confirms(anchor)
+    
+    return jsonify({
+        'record_id': record_id,
+        'anchored': True,
+        'verified': verified,
+        'leaf_hash': leaf.hex(),
+        'merkle_index': record.merkle_index,
+        'merkle_proof': proof,
+        'merkle_root': anchor.merkle_root,
+        'leaf_count': anchor.leaf_count,
+        'network': anchor.network,
+        'transaction_hash': anchor.transaction_hash,
+        'block_number': anchor.block_number,
+        'anchored_at': anchor.created_at
+    })
+
 # AI Service Integration Routes
+class AIServiceUnavailable(Exception):
+    """The AI service could not be reached or its circuit breaker is open"""
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failures; once reset_timeout
+    seconds have passed a single trial call is let through (half open), and its
+    outcome closes the breaker or opens it again"""
+    
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._lock = threading.Lock()
+    
+    def allow(self):
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                return True
+            return self.state == 'closed'
+    
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.times_opened += 1
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'times_opened': self.times_opened,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout
+            }
+
+class AIServiceClient:
+    """Calls the AI service over one shared keep-alive session behind a circuit breaker"""
+    
+    def __init__(self, base_url, timeout, pool_size, breaker):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.breaker = breaker
+        self.metrics = Counters('calls', 'failures', 'short_circuited', 'fallbacks')
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def post(self, path, payload):
+        """POST to the service; server errors count against the breaker, client errors do not"""
+        if not self.breaker.allow():
+            self.metrics.incr('short_circuited')
+            raise AIServiceUnavailable('AI service circuit breaker is open')
+        self.metrics.incr('calls')
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            self.metrics.incr('failures')
+            self.breaker.record_failure()
+            raise AIServiceUnavailable(str(e))
+        if response.status_code >= 500:
+            self.metrics.incr('failures')
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+    
+    def stats(self):
+        return dict(self.metrics.snapshot(), breaker=self.breaker.stats())
+
+ai_client = AIServiceClient(
+    app.config['AI_SERVICE_URL'],
+    (app.config['AI_CONNECT_TIMEOUT'], app.config['AI_READ_TIMEOUT']),
+    app.config['AI_POOL_SIZE'],
+    CircuitBreaker(app.config['AI_BREAKER_FAILURES'], app.config['AI_BREAKER_RESET'])
+)
+prediction_cache = TTLCache(app.config['AI_CACHE_SIZE'], app.config['AI_CACHE_TTL'])
+insights_cache = TTLCache(app.config['AI_CACHE_SIZE'], app.config['AI_CACHE_TTL'])
+
 @app.route('/api/ai/predict-price', methods=['POST'])
 def predict_price():
     try:
         data = request.get_json()
         
+        # Cache keys must be hashable scalars; anything else is a bad request
+        if not isinstance(data, dict):
+            return jsonify({'error': 'A JSON object is required'}), 400
+        for field in ('millet_type', 'state', 'district', 'interval'):
+            if data.get(field) is not None and not isinstance(data[field], str):
+                return jsonify({'error': f'{field} must be a string'}), 400
+        days_ahead = data.get('days_ahead', 7)
+        if isinstance(days_ahead, bool) or not isinstance(days_ahead, int):
+            return jsonify({'error': 'days_ahead must be a whole number of days'}), 400
+        
+        # Equivalent requests share a cache entry, using the AI service's defaults
+        cache_key = (data.get('millet_type'), data.get('state', 'Bihar'), data.get('district', 'Muzaffarpur'),
+                     data.get('days_ahead', 7), data.get('interval'))
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            return jsonify(cached)
+        
         # Call AI service
-        ai_service_url = 'http://localhost:5001/predict-price'
-        response = requests.post(ai_service_url, json=data, timeout=10)
+        response = ai_client.post('/predict-price', data)
         
         if response.status_code == 200:
-            return jsonify(response.json())
+            prediction = response.json()
+            prediction_cache.set(cache_key, prediction)
+            return jsonify(prediction)
+        elif response.status_code < 500:
+            return jsonify(response.json()), response.status_code
         else:
             return jsonify({'error': 'AI service unavailable'}), 503
             
-    except requests.exceptions.RequestException:
+    except AIServiceUnavailable:
         # Fallback prediction without AI service
+        ai_client.metrics.incr('fallbacks')
         millet_type = data.get('millet_type', 'Pearl Millet')
         base_prices = {
             'Pearl Millet': 45,
@@ -553,17 +2510,27 @@ def get_market_insights():
     try:
         data = request.get_json()
         
+        if not isinstance(data, dict) or not isinstance(data.get('state', 'Bihar'), str):
+            return jsonify({'error': 'state must be a string'}), 400
+        
+        cache_key = data.get('state', 'Bihar')
+        cached = insights_cache.get(cache_key)
+        if cached is not None:
+            return jsonify(cached)
+        
         # Call AI service
-        ai_service_url = 'http://localhost:5001/market-insights'
-        response = requests.post(ai_service_url, json=data, timeout=10)
+        response = ai_client.post('/market-insights', data)
         
         if response.status_code == 200:
-            return jsonify(response.json())
+            insights = response.json()
+            insights_cache.set(cache_key, insights)
+            return jsonify(insights)
         else:
             return jsonify({'error': 'AI service unavailable'}), 503
             
-    except requests.exceptions.RequestException:
+    except AIServiceUnavailable:
         # Fallback insights
+        ai_client.metrics.incr('fallbacks')
         return jsonify({
             'best_selling_millets': [
                 {'millet_type': 'Pearl Millet', 'current_price': 45, 'profit_potential': 5},
@@ -635,6 +2602,11 @@ def verify_payment(current_user):
         # Update order payment status
         order = Order.query.get(order_id)
         if order:
+            # Count revenue only on the first successful verification
+            if order.payment_status != 'paid':
+                bump_stats(order.seller_id, revenue=order.total_amount)
+                bump_stats(order.buyer_id, spent=order.total_amount)
+                bump_stats(GLOBAL_STATS_ID, revenue=order.total_amount)
             order.payment_status = 'paid'
             
             # Create payment record
@@ -683,13 +2655,29 @@ def upload_image(current_user):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/metrics', methods=['GET'])
+@token_required
+def get_metrics(current_user):
+    if current_user.user_type != 'admin':
+        return jsonify({'message': 'Only admins can view metrics!'}), 403
+    
+    return jsonify({
+        'user_cache': user_cache.stats(),
+        'password_pool': password_pool.stats(),
+        'orders': order_metrics.snapshot(),
+        'ai_service': ai_client.stats(),
+        'ai_prediction_cache': prediction_cache.stats(),
+        'ai_insights_cache': insights_cache.stats(),
+        'trace_anchoring': anchor_metrics.snapshot()
+    })
+
 def allowed_file(filename):
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf'}
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        upgrade_database()
         
         # Create sample data
         if User.query.count() == 0:
@@ -770,6 +2758,8 @@ if __name__ == '__main__':
                 source='Government Mandi'
             )
             db.session.add(price1)
+            db.session.flush()
+            refresh_price_rollups([(price1.millet_type, price1.state, price1.district, price1.date)])
             
             # Create sample government scheme
             scheme1 = GovernmentScheme(
@@ -782,6 +2772,16 @@ if __name__ == '__main__':
             )
             db.session.add(scheme1)
             
+            for resource in ('products', 'market_prices', 'schemes'):
+                bump_version(resource)
             db.session.commit()
+        
+        if db.session.get(DashboardStats, GLOBAL_STATS_ID) is None:
+            rebuild_dashboard_stats()
+    
+    # Only the reloader's serving child anchors, so windows are not anchored twice
+    if app.config['ANCHOR_WINDOW_SECONDS'] > 0 and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        threading.Thread(target=run_trace_anchorer, args=(app.config['ANCHOR_WINDOW_SECONDS'],),
+                         name='trace-anchorer', daemon=True).start()
     
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,132 @@
+"""Mixed read/write load test showing the effect of each SQLite engine setting.
+
+Usage (from the backend directory):
+    python benchmarks/db_readwrite.py --readers 8 --writers 4 --seconds 5
+
+Every scenario runs in a fresh process against its own throwaway SQLite
+database, adding one setting at a time on top of the previous scenario.
+Readers page the product catalog and fetch single products; writers place
+orders. Reported errors are 5xx responses (lock timeouts that exhausted
+create_order's retries, or "database is locked" on reads).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = [
+    ('rollback journal, sync FULL, no busy_timeout',
+     {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_BUSY_TIMEOUT': '0', 'SQLITE_MMAP_SIZE': '0'}),
+    ('+ busy_timeout=5000',
+     {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_BUSY_TIMEOUT': '5000', 'SQLITE_MMAP_SIZE': '0'}),
+    ('+ journal_mode=WAL',
+     {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_BUSY_TIMEOUT': '5000', 'SQLITE_MMAP_SIZE': '0'}),
+    ('+ synchronous=NORMAL',
+     {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'NORMAL', 'SQLITE_BUSY_TIMEOUT': '5000', 'SQLITE_MMAP_SIZE': '0'}),
+    ('+ mmap_size=256MB (platform default)',
+     {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'NORMAL', 'SQLITE_BUSY_TIMEOUT': '5000',
+      'SQLITE_MMAP_SIZE': str(256 * 1024 * 1024)}),
+]
+
+
+def run_worker(args):
+    sys.path.insert(0, BACKEND_DIR)
+    import jwt
+    from app import app, db, User, MilletProduct, upgrade_database
+
+    with app.app_context():
+        upgrade_database()
+        farmer = User(username='farmer', email='farmer@bench', full_name='Bench Farmer', phone='0',
+                      address='-', state='Bihar', district='Patna', user_type='farmer')
+        buyer = User(username='buyer', email='buyer@bench', full_name='Bench Buyer', phone='0',
+                     address='-', state='Bihar', district='Patna', user_type='buyer')
+        farmer.password_hash = buyer.password_hash = '-'
+        db.session.add_all([farmer, buyer])
+        db.session.commit()
+        db.session.add_all(
+            MilletProduct(name=f'Product {i}', type='Pearl Millet', variety='HHB 67', farmer_id=farmer.id,
+                          quantity=1e9, unit='kg', price_per_unit=40 + i % 20,
+                          harvest_date=datetime.now().date(), quality_grade='A')
+            for i in range(args.products)
+        )
+        db.session.commit()
+        token = jwt.encode({'user_id': buyer.id, 'exp': datetime.utcnow() + timedelta(hours=1)},
+                           app.config['SECRET_KEY'], algorithm='HS256')
+
+    deadline = time.perf_counter() + args.seconds
+    totals = {'reads': 0, 'writes': 0, 'read_errors': 0, 'write_errors': 0}
+    lock = threading.Lock()
+
+    def reader(seed):
+        client = app.test_client()
+        reads = errors = 0
+        while time.perf_counter() < deadline:
+            reads += 1
+            if reads % 2:
+                status = client.get('/api/products?limit=50').status_code
+            else:
+                status = client.get(f'/api/products/{(seed * 7919 + reads) % args.products + 1}').status_code
+            errors += status >= 500
+        with lock:
+            totals['reads'] += reads
+            totals['read_errors'] += errors
+
+    def writer(seed):
+        client = app.test_client()
+        writes = errors = 0
+        while time.perf_counter() < deadline:
+            writes += 1
+            status = client.post('/api/orders', headers={'Authorization': token},
+                                 json={'product_id': (seed * 104729 + writes) % args.products + 1,
+                                       'quantity': 1, 'delivery_address': '-'}).status_code
+            errors += status >= 500
+        with lock:
+            totals['writes'] += writes
+            totals['write_errors'] += errors
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(json.dumps(totals))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s per scenario\n")
+    print(f"{'scenario':<42} {'reads/s':>9} {'writes/s':>9} {'read err':>9} {'write err':>9}")
+    for name, settings in SCENARIOS:
+        env = dict(os.environ, **settings, BCRYPT_LOG_ROUNDS='4',
+                   DATABASE_URL=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}")
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', '--readers', str(args.readers),
+             '--writers', str(args.writers), '--seconds', str(args.seconds), '--products', str(args.products)],
+            env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        totals = json.loads(output.strip().splitlines()[-1])
+        print(f"{name:<42} {totals['reads'] / args.seconds:>9.0f} {totals['writes'] / args.seconds:>9.0f} "
+              f"{totals['read_errors']:>9} {totals['write_errors']:>9}")
+
+
+if __name__ == '__main__':
+    main()
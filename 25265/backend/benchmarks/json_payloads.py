@@ -0,0 +1,116 @@
+"""Compare serialization CPU and bytes on the wire for 10k-row JSON responses.
+
+Usage (from the backend directory):
+    python benchmarks/json_payloads.py --rows 10000
+
+Builds product and order rows shaped like the API responses and serializes
+them with the old path (per-field isoformat + Flask's default sorted JSON),
+the platform's provider on the standard library, and the provider on orjson
+(when installed), then reports the size after gzip and brotli (when installed).
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'json_payloads.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, orjson, brotli
+
+
+def product_rows(count):
+    start = datetime(2024, 1, 1)
+    return [{
+        'id': i,
+        'name': f'Premium Pearl Millet lot {i}',
+        'type': 'Pearl Millet',
+        'variety': 'HHB 67',
+        'farmer_name': f'Farmer {i % 500}',
+        'quantity': 100.0 + i % 50,
+        'unit': 'kg',
+        'price_per_unit': 40.0 + i % 25,
+        'harvest_date': (start + timedelta(days=i % 365)).date(),
+        'quality_grade': 'ABC'[i % 3],
+        'organic_certified': i % 4 == 0,
+        'description': 'High quality organic pearl millet with excellent nutritional value',
+        'created_at': start + timedelta(minutes=i)
+    } for i in range(count)]
+
+
+def order_rows(count):
+    start = datetime(2024, 1, 1)
+    return [{
+        'id': i,
+        'order_number': f'ORD20240101{i:08X}',
+        'product_name': f'Premium Pearl Millet lot {i % 1000}',
+        'quantity': 1.0 + i % 20,
+        'total_amount': 45.0 * (1 + i % 20),
+        'status': ('pending', 'confirmed', 'shipped', 'delivered')[i % 4],
+        'payment_status': ('pending', 'paid')[i % 2],
+        'order_date': start + timedelta(minutes=i),
+        'delivery_date': start + timedelta(days=3, minutes=i) if i % 3 else None,
+        'buyer_name': f'Buyer {i % 300}',
+        'seller_name': f'Farmer {i % 500}'
+    } for i in range(count)]
+
+
+def legacy_dumps(rows):
+    """The old path: isoformat every date field by hand, then Flask's default dumps"""
+    converted = [{key: value.isoformat() if hasattr(value, 'isoformat') else value
+                  for key, value in row.items()} for row in rows]
+    return json.dumps(converted, sort_keys=True, separators=(',', ':')).encode()
+
+
+def provider_dumps(serializer):
+    def dumps(rows):
+        app.config['JSON_SERIALIZER'] = serializer
+        with app.app_context():
+            return app.json.response(rows).get_data()
+    return dumps
+
+
+def timed(fn, rows, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(rows)
+        best = min(best, time.perf_counter() - started)
+    return body, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    serializers = [('legacy isoformat + json', legacy_dumps), ('provider, json', provider_dumps('json'))]
+    if orjson:
+        serializers.append(('provider, orjson', provider_dumps('orjson')))
+
+    for label, rows in (('products', product_rows(args.rows)), ('orders', order_rows(args.rows))):
+        print(f"\n{args.rows} {label}")
+        print(f"  {'serializer':<26} {'time ms':>8}")
+        body = None
+        for name, fn in serializers:
+            body, seconds = timed(fn, rows, args.repeat)
+            print(f"  {name:<26} {seconds * 1000:>8.1f}")
+
+        print(f"  {'encoding':<26} {'bytes':>10} {'ratio':>6} {'time ms':>8}")
+        encodings = [('identity', lambda data: data),
+                     ('gzip level 6', lambda data: gzip.compress(data, compresslevel=6)),
+                     ('gzip level 1', lambda data: gzip.compress(data, compresslevel=1))]
+        if brotli:
+            encodings.append(('brotli quality 5', lambda data: brotli.compress(data, quality=5)))
+        for name, fn in encodings:
+            encoded, seconds = timed(fn, body, args.repeat)
+            print(f"  {name:<26} {len(encoded):>10} {len(body) / len(encoded):>6.1f} {seconds * 1000:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
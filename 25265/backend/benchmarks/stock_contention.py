@@ -0,0 +1,115 @@
+"""Hammer a single product with concurrent orders and report throughput and oversell.
+
+Usage (from the backend directory):
+    python benchmarks/stock_contention.py --threads 16 --orders 50 --stock 500
+    python benchmarks/stock_contention.py --legacy   # old read-check-write path
+
+Runs against a throwaway SQLite database, never the platform database.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'stock_contention.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt
+from app import app, db, User, MilletProduct, Order, rebuild_dashboard_stats
+
+
+def setup(stock):
+    with app.app_context():
+        db.create_all()
+        farmer = User(username='farmer', email='farmer@bench', full_name='Bench Farmer', phone='0',
+                      address='-', state='Bihar', district='Patna', user_type='farmer')
+        buyer = User(username='buyer', email='buyer@bench', full_name='Bench Buyer', phone='0',
+                     address='-', state='Bihar', district='Patna', user_type='buyer')
+        farmer.password_hash = buyer.password_hash = '-'
+        db.session.add_all([farmer, buyer])
+        db.session.commit()
+        product = MilletProduct(name='Hot Listing', type='Pearl Millet', variety='HHB 67', farmer_id=farmer.id,
+                                quantity=stock, unit='kg', price_per_unit=45.0,
+                                harvest_date=datetime.now().date(), quality_grade='A')
+        db.session.add(product)
+        db.session.commit()
+        rebuild_dashboard_stats()
+        token = jwt.encode({'user_id': buyer.id, 'exp': datetime.utcnow() + timedelta(hours=1)},
+                           app.config['SECRET_KEY'], algorithm='HS256')
+        return product.id, token
+
+
+def legacy_order(product_id, buyer_id):
+    """The pre-reservation create_order: read, check in Python, write back"""
+    product = db.session.get(MilletProduct, product_id)
+    if product.quantity < 1:
+        return 400
+    db.session.add(Order(order_number=f'L{time.perf_counter_ns()}{threading.get_ident()}', buyer_id=buyer_id,
+                         seller_id=product.farmer_id, product_id=product.id, quantity=1,
+                         total_amount=product.price_per_unit, delivery_address='-'))
+    product.quantity -= 1
+    db.session.commit()
+    return 201
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--orders', type=int, default=50, help='orders per thread')
+    parser.add_argument('--stock', type=int, default=500, help='initial product quantity')
+    parser.add_argument('--legacy', action='store_true', help='benchmark the old read-check-write path')
+    args = parser.parse_args()
+
+    product_id, token = setup(args.stock)
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker():
+        client = app.test_client()
+        local = {}
+        for _ in range(args.orders):
+            if args.legacy:
+                with app.app_context():
+                    try:
+                        status = legacy_order(product_id, 2)
+                    except Exception:
+                        db.session.rollback()
+                        status = 500
+            else:
+                status = client.post('/api/orders', headers={'Authorization': token},
+                                      json={'product_id': product_id, 'quantity': 1,
+                                            'delivery_address': '-'}).status_code
+            local[status] = local.get(status, 0) + 1
+        with lock:
+            for status, count in local.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        remaining = db.session.get(MilletProduct, product_id).quantity
+        ordered = db.session.query(db.func.coalesce(db.func.sum(Order.quantity), 0)).scalar()
+
+    attempts = args.threads * args.orders
+    print(f"mode:        {'legacy read-check-write' if args.legacy else 'conditional UPDATE'}")
+    print(f"requests:    {attempts} from {args.threads} threads in {elapsed:.2f}s "
+          f"({attempts / elapsed:.0f} req/s)")
+    print(f"statuses:    {dict(sorted(statuses.items()))}")
+    print(f"stock:       {args.stock} initial, {remaining:g} remaining, {ordered:g} ordered")
+    print(f"oversold:    {max(0, ordered - args.stock):g} units "
+          f"(lost updates: {max(0, ordered - (args.stock - remaining)):g})")
+
+
+if __name__ == '__main__':
+    main()
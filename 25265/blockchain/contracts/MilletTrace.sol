@@ -24,16 +24,26 @@ contract MilletTrace {
         bool exists;
     }
     
+    struct MerkleAnchor {
+        uint256 leafCount;
+        uint256 timestamp;
+        string windowId;
+        bool exists;
+    }
+    
     mapping(string => MilletBatch) public milletBatches;
     mapping(string => TraceabilityRecord[]) public batchTraceability;
     mapping(address => bool) public authorizedOperators;
+    mapping(bytes32 => MerkleAnchor) public merkleAnchors;
     
     address public owner;
     uint256 public totalBatches;
+    uint256 public totalAnchors;
     
     event BatchCreated(string indexed batchId, string farmerId, string milletType);
     event TraceabilityAdded(string indexed batchId, string stage, uint256 timestamp);
     event BatchVerified(string indexed batchId, bool verified);
+    event RootAnchored(bytes32 indexed root, uint256 leafCount, string windowId, uint256 timestamp);
     
     modifier onlyOwner() {
         require(msg.sender == owner, "Only owner can call this function");
@@ -133,6 +143,44 @@ contract MilletTrace {
         emit BatchVerified(_batchId, _verified);
     }
     
+    // One transaction commits a whole window of off-chain traceability records:
+    // leaves are sha256(0x00 || record), inner nodes sha256(0x01 || left || right)
+    function anchorRoot(bytes32 _root, uint256 _leafCount, string memory _windowId) external onlyAuthorized {
+        require(!merkleAnchors[_root].exists, "Root already anchored");
+        require(_leafCount > 0, "Empty window");
+        
+        merkleAnchors[_root] = MerkleAnchor({
+            leafCount: _leafCount,
+            timestamp: block.timestamp,
+            windowId: _windowId,
+            exists: true
+        });
+        
+        totalAnchors++;
+        
+        emit RootAnchored(_root, _leafCount, _windowId, block.timestamp);
+    }
+    
+    function verifyInclusion(
+        bytes32 _root,
+        bytes32 _leaf,
+        bytes32[] memory _proof,
+        bool[] memory _siblingOnLeft
+    ) external view returns (bool) {
+        require(_proof.length == _siblingOnLeft.length, "Proof length mismatch");
+        if (!merkleAnchors[_root].exists) {
+            return false;
+        }
+        
+        bytes32 node = _leaf;
+        for (uint i = 0; i < _proof.length; i++) {
+            node = _siblingOnLeft[i]
+                ? sha256(abi.encodePacked(bytes1(0x01), _proof[i], node))
+                : sha256(abi.encodePacked(bytes1(0x01), node, _proof[i]));
+        }
+        return node == _root;
+    }
+    
     function getBatchInfo(string memory _batchId) external view returns (
         string memory batchId,
         string memory farmerId,
@@ -0,0 +1,100 @@
+// HTTP front for blockchainService so the Flask backend can anchor Merkle
+// roots and register batches (set ANCHOR_SERVICE_URL to this server's URL).
+// It spends the service account's gas, so it listens on localhost only unless
+// ANCHOR_HOST says otherwise, and then requires ANCHOR_TOKEN, which the backend
+// sends as ANCHOR_SERVICE_TOKEN in the X-Anchor-Token header
+const crypto = require('crypto');
+const http = require('http');
+require('dotenv').config();
+const blockchainService = require('./blockchainService');
+
+const PORT = parseInt(process.env.ANCHOR_PORT || '7600', 10);
+const HOST = process.env.ANCHOR_HOST || '127.0.0.1';
+const TOKEN = process.env.ANCHOR_TOKEN || '';
+const LOOPBACK_HOSTS = ['127.0.0.1', '::1', 'localhost'];
+const MAX_BODY_BYTES = 64 * 1024;
+
+const routes = {
+  '/anchor': body => blockchainService.anchorMerkleRoot(
+    '0x' + body.root,
+    body.leafCount,
+    body.windowId
+  ),
+  '/batches': body => blockchainService.createMilletBatch(body)
+};
+
+function readJson(req) {
+  return new Promise((resolve, reject) => {
+    let body = '';
+    req.on('data', chunk => {
+      body += chunk;
+      if (body.length > MAX_BODY_BYTES) {
+        reject(new Error('Request body too large'));
+        req.destroy();
+      }
+    });
+    req.on('end', () => {
+      try {
+        resolve(JSON.parse(body || '{}'));
+      } catch (error) {
+        reject(error);
+      }
+    });
+    req.on('error', reject);
+  });
+}
+
+function authorized(req) {
+  if (!TOKEN) {
+    return true;
+  }
+  const given = Buffer.from(req.headers['x-anchor-token'] || '');
+  const expected = Buffer.from(TOKEN);
+  return given.length === expected.length && crypto.timingSafeEqual(given, expected);
+}
+
+function send(res, status, payload) {
+  res.writeHead(status, { 'Content-Type': 'application/json' });
+  res.end(JSON.stringify(payload));
+}
+
+const server = http.createServer(async (req, res) => {
+  const handler = routes[req.url];
+  if (req.method !== 'POST' || !handler) {
+    return send(res, 404, { error: 'Not found' });
+  }
+  if (!authorized(req)) {
+    return send(res, 401, { error: 'Invalid anchor token' });
+  }
+
+  let body;
+  try {
+    body = await readJson(req);
+  } catch (error) {
+    return send(res, 400, { error: error.message });
+  }
+
+  const result = await handler(body);
+  if (!result.success) {
+    return send(res, 502, { error: result.error });
+  }
+  // web3 returns block numbers as BigInt, which JSON cannot encode
+  send(res, 201, {
+    transactionHash: result.transactionHash,
+    blockNumber: Number(result.blockNumber)
+  });
+});
+
+if (!TOKEN && !LOOPBACK_HOSTS.includes(HOST)) {
+  console.error(`Refusing to listen on ${HOST} without ANCHOR_TOKEN`);
+  process.exit(1);
+}
+
+blockchainService.initialize().then(ready => {
+  if (!ready) {
+    process.exit(1);
+  }
+  server.listen(PORT, HOST, () => {
+    console.log(`Anchor server listening on ${HOST}:${PORT}`);
+  });
+});
@@ -190,6 +190,69 @@ class BlockchainService {
     }
   }
 
+  async anchorMerkleRoot(root, leafCount, windowId) {
+    try {
+      // A retry after the backend lost the receipt would revert with "Root
+      // already anchored"; answer with the original transaction instead
+      const anchored = await this.contract.methods.merkleAnchors(root).call();
+      if (anchored.exists) {
+        const events = await this.contract.getPastEvents('RootAnchored', {
+          filter: { root },
+          fromBlock: 0,
+          toBlock: 'latest'
+        });
+        if (!events.length) {
+          throw new Error('Root is anchored but its RootAnchored event was not found');
+        }
+        return {
+          success: true,
+          transactionHash: events[0].transactionHash,
+          blockNumber: events[0].blockNumber
+        };
+      }
+
+      const result = await this.contract.methods
+        .anchorRoot(root, leafCount, windowId)
+        .send({ from: this.account });
+
+      return {
+        success: true,
+        transactionHash: result.transactionHash,
+        blockNumber: result.blockNumber
+      };
+    } catch (error) {
+      console.error('Error anchoring merkle root:', error);
+      return {
+        success: false,
+        error: error.message
+      };
+    }
+  }
+
+  async verifyInclusion(root, leaf, proof) {
+    try {
+      const verified = await this.contract.methods
+        .verifyInclusion(
+          root,
+          leaf,
+          proof.map(step => step.hash),
+          proof.map(step => step.position === 'left')
+        )
+        .call();
+
+      return {
+        success: true,
+        verified
+      };
+    } catch (error) {
+      console.error('Error verifying inclusion proof:', error);
+      return {
+        success: false,
+        error: error.message
+      };
+    }
+  }
+
   async getTotalBatches() {
     try {
       const total = await this.contract.methods
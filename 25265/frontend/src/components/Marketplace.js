@@ -7,6 +7,8 @@ const Marketplace = () => {
   const { user, isAuthenticated } = useAuth();
   const [products, setProducts] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filters, setFilters] = useState({
     type: '',
     state: '',
@@ -18,18 +20,21 @@ const Marketplace = () => {
     fetchProducts();
   }, [filters]);
 
-  const fetchProducts = async () => {
+  // The API returns one page at a time; X-Next-Cursor points at the next one
+  const fetchProducts = async (cursor = null) => {
     try {
       const queryParams = new URLSearchParams();
       if (filters.type) queryParams.append('type', filters.type);
       if (filters.state) queryParams.append('state', filters.state);
       if (filters.organic) queryParams.append('organic', 'true');
       if (filters.sortBy) queryParams.append('sort', filters.sortBy);
+      if (cursor) queryParams.append('cursor', cursor);
 
       const response = await fetch(`/api/products?${queryParams}`);
       if (response.ok) {
         const data = await response.json();
-        setProducts(data);
+        setProducts(prev => (cursor ? [...prev, ...data] : data));
+        setNextCursor(response.headers.get('X-Next-Cursor'));
       }
     } catch (error) {
       toast.error('Failed to load products');
@@ -38,6 +43,12 @@ const Marketplace = () => {
     }
   };
 
+  const loadMoreProducts = async () => {
+    setLoadingMore(true);
+    await fetchProducts(nextCursor);
+    setLoadingMore(false);
+  };
+
   const handleFilterChange = (key, value) => {
     setFilters(prev => ({
       ...prev,
@@ -260,6 +271,20 @@ const Marketplace = () => {
         )}
       </div>
 
+      {nextCursor && (
+        <div className="row mb-4">
+          <div className="col-12 text-center">
+            <button
+              className="btn btn-outline-primary"
+              onClick={loadMoreProducts}
+              disabled={loadingMore}
+            >
+              {loadingMore ? 'Loading...' : 'Load More Products'}
+            </button>
+          </div>
+        </div>
+      )}
+
       {/* Call to Action */}
       {!isAuthenticated && (
         <div className="row mt-5">
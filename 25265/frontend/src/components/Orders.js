@@ -6,14 +6,18 @@ const Orders = () => {
   const { user } = useAuth();
   const [orders, setOrders] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchOrders();
   }, []);
 
-  const fetchOrders = async () => {
+  // Orders come one page at a time, newest first; X-Next-Cursor points at the next page
+  const fetchOrders = async (cursor = null) => {
     try {
-      const response = await fetch('/api/orders', {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+      const response = await fetch(`/api/orders${query}`, {
         headers: {
           'Authorization': localStorage.getItem('token')
         }
@@ -21,7 +25,8 @@ const Orders = () => {
       
       if (response.ok) {
         const data = await response.json();
-        setOrders(data);
+        setOrders(prev => (cursor ? [...prev, ...data] : data));
+        setNextCursor(response.headers.get('X-Next-Cursor'));
       }
     } catch (error) {
       toast.error('Failed to load orders');
@@ -30,6 +35,12 @@ const Orders = () => {
     }
   };
 
+  const loadMoreOrders = async () => {
+    setLoadingMore(true);
+    await fetchOrders(nextCursor);
+    setLoadingMore(false);
+  };
+
   const getStatusBadge = (status) => {
     const statusMap = {
       'pending': 'warning',
@@ -188,6 +199,17 @@ const Orders = () => {
                     </tbody>
                   </table>
                 </div>
+                {nextCursor && (
+                  <div className="text-center mt-3">
+                    <button
+                      className="btn btn-outline-primary"
+                      onClick={loadMoreOrders}
+                      disabled={loadingMore}
+                    >
+                      {loadingMore ? 'Loading...' : 'Load More Orders'}
+                    </button>
+                  </div>
+                )}
               </div>
             </div>
           </div>
@@ -20,10 +20,9 @@ const ProductDetails = () => {
 
   const fetchProduct = async () => {
     try {
-      const response = await fetch(`/api/products`);
+      const response = await fetch(`/api/products/${id}`);
       if (response.ok) {
-        const products = await response.json();
-        const productData = products.find(p => p.id === parseInt(id));
+        const productData = await response.json();
         setProduct(productData);
       }
     } catch (error) {
@@ -15,10 +15,9 @@ const Traceability = () => {
   const fetchTraceabilityData = async () => {
     try {
       // Fetch product details
-      const productResponse = await fetch('/api/products');
+      const productResponse = await fetch(`/api/products/${productId}`);
       if (productResponse.ok) {
-        const products = await productResponse.json();
-        const productData = products.find(p => p.id === parseInt(productId));
+        const productData = await productResponse.json();
         setProduct(productData);
       }
 